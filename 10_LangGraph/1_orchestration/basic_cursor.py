@@ -8,17 +8,25 @@ from langgraph.graph import StateGraph, START, END
 import json
 import requests
 import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from genai_utils.llm_cache import DEFAULT_LLM_CACHE_PATH, REPLY_TTL, CachedChatClient
 
 # Load API keys
 load_dotenv()
 api_key = os.getenv("GEMINI_API_KEY")
 
-# Wrap LLM
-client = wrap_openai(
-    OpenAI(
-        base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-        api_key=api_key,
-    )
+# Wrap LLM (calls made with cache=True are answered from the response cache when repeated)
+client = CachedChatClient(
+    wrap_openai(
+        OpenAI(
+            base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+            api_key=api_key,
+        )
+    ),
+    path=DEFAULT_LLM_CACHE_PATH,
 )
 
 
@@ -215,6 +223,14 @@ User query: "{state['user_query']}"
 
 
 # ----- Decision Logic -----
+ROUTES = (
+    "tool_router",
+    "solve_coding_question",
+    "solve_simple_question",
+    "handle_complex_query",
+)
+
+
 def decide_path(
     state: State,
 ) -> Literal[
@@ -254,8 +270,17 @@ Do not include any explanations or additional text.
         {"role": "user", "content": state["user_query"]},
     ]
 
+    # Same query -> same route: repeated decisions cost nothing. Only a reply
+    # naming a route is reused (anything else would fall back to simple forever)
     res = client.chat.completions.create(
-        model="gemini-2.5-flash-preview-04-17", messages=messages
+        model="gemini-2.5-flash-preview-04-17",
+        messages=messages,
+        cache=True,
+        ttl=REPLY_TTL,
+        cache_if=lambda response: any(
+            route in (response.choices[0].message.content or "").lower()
+            for route in ROUTES
+        ),
     )
     decision = res.choices[0].message.content.strip().lower()
 
@@ -0,0 +1,58 @@
+import time
+from pathlib import Path
+
+import tiktoken
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from tokenizer import Tokenizer
+
+PDF_PATH = Path(__file__).parent.parent.parent / "nodejs.pdf"
+VOCAB_SIZE = 4096
+
+
+def load_chunks(pdf_path):
+    """
+    Same chunks the RAG scripts index: 1000 chars with 200 overlap.
+    """
+    docs = PyPDFLoader(pdf_path).load()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    return [doc.page_content for doc in splitter.split_documents(docs)]
+
+
+def measure(name, encode_all):
+    start = time.perf_counter()
+    encoded = encode_all()
+    elapsed = time.perf_counter() - start
+
+    total_tokens = sum(len(ids) for ids in encoded)
+    print(
+        f"{name:<32} {total_tokens:>10,} tokens  {elapsed:8.3f}s  "
+        f"{total_tokens / elapsed:>12,.0f} tokens/sec"
+    )
+
+
+def main():
+    chunks = load_chunks(PDF_PATH)
+    print(f"📄 {len(chunks)} chunks, {sum(map(len, chunks)):,} chars\n")
+
+    tokenizer = Tokenizer()
+    start = time.perf_counter()
+    tokenizer.train("\n".join(chunks), vocab_size=VOCAB_SIZE)
+    print(f"🏋️ Trained {VOCAB_SIZE} token vocab in {time.perf_counter() - start:.2f}s\n")
+
+    measure("Tokenizer.encode (cold cache)", lambda: [tokenizer.encode(c) for c in chunks])
+    measure("Tokenizer.encode (warm cache)", lambda: [tokenizer.encode(c) for c in chunks])
+    measure("Tokenizer.encode_batch (threads)", lambda: tokenizer.encode_batch(chunks))
+    measure(
+        "Tokenizer.encode_batch (processes)",
+        lambda: tokenizer.encode_batch(chunks, use_processes=True),
+    )
+
+    encoding = tiktoken.get_encoding("cl100k_base")
+    measure("tiktoken cl100k_base", lambda: [encoding.encode_ordinary(c) for c in chunks])
+    measure("tiktoken cl100k_base (batch)", lambda: encoding.encode_ordinary_batch(chunks))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,30 @@
+import sys
+from pathlib import Path
+
 from dotenv import load_dotenv
 from openai import OpenAI
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from genai_utils.embedding_cache import (
+    OPENAI_BATCH_SIZE,
+    CachedEmbeddings,
+    OpenAIClientEmbeddings,
+)
+
 load_dotenv()
 
 client = OpenAI()
 
+# Same text embedded again (even on a later run) comes from the local cache
+embedder = CachedEmbeddings(
+    OpenAIClientEmbeddings(client, model="text-embedding-3-small"),
+    model="text-embedding-3-small",
+    batch_size=OPENAI_BATCH_SIZE,
+)
+
 text = "Eiffel Tower is in Paris and is a famous landmark, it is 324 meters tall"
 
-response = client.embeddings.create(
-    input=text,
-    model="text-embedding-3-small"
-)
+embedding = embedder.embed_documents([text])[0]
 
-print("Vector Embeddings", response.data[0].embedding)
\ No newline at end of file
+print("Vector Embeddings", embedding)
+print("Cache stats", embedder.stats)
@@ -1,16 +1,32 @@
+import sys
+import threading
+import time
 from pathlib import Path
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_qdrant import QdrantVectorStore
 from openai import OpenAI
 import os
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from genai_utils.chunk_artifact import build_chunk_artifact
+from genai_utils.compression import compress_context, compression_report
+from genai_utils.context_packer import context_report, pack_context
+from genai_utils.embedding_cache import CachedEmbeddings
+from genai_utils.local_vector_store import sync_pdf
+from genai_utils.retrieval_service import RetrievalService
+from genai_utils.semantic_cache import SemanticCache
+from genai_utils.streaming import iter_chat_text, print_stream, timing_report
+from genai_utils.pdf_pipeline import iter_pdf_chunks
+
 # Constants
 PDF_PATH = "nodejs.pdf"
 QDRANT_URL = "http://localhost:6333"
 COLLECTION_NAME = "learning_langchain"
 EMBED_MODEL = "models/embedding-001"
+# Candidates fetched per query, how many diverse ones are kept, and the
+# token budget they are packed into
+FETCH_K = 12
+CONTEXT_K = 6
+CONTEXT_MAX_TOKENS = 1500
 
 os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = (
     "E:\Downloads\gemini-key-for-learining-02807fd398a1.json"
@@ -20,51 +36,91 @@ os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = (
 def load_and_split_pdf(file_path: str):
     """
     Load PDF and split into overlapping chunks.
+    Page ranges are extracted and chunked in parallel worker processes.
     """
-    loader = PyPDFLoader(file_path)
-    documents = loader.load()
-
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    return splitter.split_documents(documents)
+    return list(iter_pdf_chunks(file_path))
 
 
-def index_documents():
+def get_embedder():
     """
-    Load, chunk, embed and index PDF content into Qdrant vector DB.
-    Run once during setup.
+    Gemini embedder behind the local content-hash cache, so unchanged chunks
+    and repeated queries never hit the embeddings API twice.
     """
-    chunks = load_and_split_pdf(PDF_PATH)
-    embedder = GoogleGenerativeAIEmbeddings(model=EMBED_MODEL)
+    return CachedEmbeddings(GoogleGenerativeAIEmbeddings(model=EMBED_MODEL), model=EMBED_MODEL)
 
-    QdrantVectorStore.from_documents(
-        documents=chunks,
-        embedding=embedder,
-        url=QDRANT_URL,
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """
+    The process-wide RetrievalService: embedder, vector store, chunk artifact
+    and Gemini client are created on first use and reused by every query.
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = RetrievalService(
+                    COLLECTION_NAME,
+                    PDF_PATH,
+                    get_embedder(),
+                    chat_client=OpenAI(
+                        api_key=os.getenv("GEMINI_API_KEY"),
+                        base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+                    ),
+                    url=QDRANT_URL,
+                )
+    return _service
+
+
+def index_documents(rebuild=False):
+    """
+    Load, chunk, embed and index PDF content into the vector DB
+    (Qdrant, or the in-process index with VECTOR_BACKEND=local).
+    Safe to re-run: only new or changed chunks are embedded and upserted,
+    and chunks that no longer exist in the PDF are deleted.
+    rebuild=True drops a collection indexed without a manifest or by another
+    embedding model and indexes it from scratch.
+    """
+    stats = sync_pdf(
+        PDF_PATH,
+        embedding=get_embedder(),
         collection_name=COLLECTION_NAME,
+        url=QDRANT_URL,
+        rebuild=rebuild,
     )
 
-    print("✅ Documents successfully indexed into Qdrant.")
+    print(
+        f"✅ Documents indexed: {stats['changed_pages']}/{stats['pages']} pages changed, "
+        f"{len(stats['added'])} chunks added, {len(stats['deleted'])} deleted."
+    )
 
+    # Parsed chunks + BM25 index for query-time use, so nothing re-parses the PDF per query
+    build_chunk_artifact(PDF_PATH)
 
-def retrieve_relevant_docs(query: str):
+
+def retrieve_relevant_chunks(query: str):
     """
-    Connect to Qdrant and retrieve all relevant documents for a query.
+    Retrieve all relevant chunks (Documents) for a query through the shared service.
+    Dense hits are fused with BM25 hits, so exact API names (fs.readFile) count,
+    then MMR keeps a diverse subset so overlapping chunks don't repeat in the prompt.
     """
-    embedder = GoogleGenerativeAIEmbeddings(model=EMBED_MODEL)
+    return get_service().retrieve(query, k=CONTEXT_K, fetch_k=FETCH_K)
 
-    retriever = QdrantVectorStore.from_existing_collection(
-        url=QDRANT_URL,
-        collection_name=COLLECTION_NAME,
-        embedding=embedder,
-    )
 
-    results = retriever.similarity_search(query)
-    return [doc.page_content for doc in results]
+def retrieve_relevant_docs(query: str):
+    """
+    Text of all relevant chunks for a query.
+    """
+    return [doc.page_content for doc in retrieve_relevant_chunks(query)]
 
 
 def chat_with_context(query: str, context_chunks: list[str]):
     """
     Send user query and full context (all relevant chunks) to OpenAI for a response.
+    The answer is streamed and printed as it is generated.
     """
     # Join all context chunks into a single string (as context_chunks is array so we are converting it into string)
 
@@ -77,39 +133,71 @@ You are a helpful AI assistant. Resolve user queries using the following context
 {context}
 """
 
-    client = OpenAI(
-        api_key=os.getenv("GEMINI_API_KEY"),
-        base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-    )
-
-    response = client.chat.completions.create(
+    start = time.perf_counter()
+    stream = get_service().chat(
         model="gemini-2.5-flash-preview-04-17",
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": query},
         ],
+        stream=True,
     )
 
     print("\n📘 Response:")
-    print(response.choices[0].message.content)
+    answer, timings = print_stream(iter_chat_text(stream), start)
+    print(timing_report(timings))
+    return answer
 
 
 def interactive_cli():
     """
     Start command-line interface for interactive Q&A.
+    Near-identical questions are answered from the semantic answer cache.
     """
+    embedder = get_service().embedding
+    answer_cache = SemanticCache(namespace=COLLECTION_NAME)
+
     print("🔍 Ready to search. Type your query (or 'exit' to quit):")
     while True:
         query = input("> ").strip()
         if query.lower() in ["exit", "quit"]:
             break
 
-        context_chunks = retrieve_relevant_docs(query)
-        if not context_chunks:
+        start = time.perf_counter()
+        query_vector = embedder.embed_query(query)
+        cached = answer_cache.lookup(query_vector)
+        if cached:
+            print(f"\n📘 Response (cached, similarity {cached.similarity:.3f}):")
+            print(cached.answer)
+            continue
+
+        chunks = retrieve_relevant_chunks(query)
+        if not chunks:
             print("⚠️ No relevant documents found.")
             continue
 
-        chat_with_context(query, context_chunks)
+        # Overlapping neighbours are merged into one span and packed into the budget
+        context = pack_context(chunks, max_tokens=CONTEXT_MAX_TOKENS)
+        print(context_report(context))
+
+        # Only the sentences relevant to the query (and their neighbours) are sent
+        compressed = compress_context(
+            query, [span.page_content for span in context.spans], embedder
+        )
+        print(compression_report(compressed))
+
+        answer = chat_with_context(query, [text for text in compressed.texts if text])
+        answer_cache.put(
+            query,
+            query_vector,
+            answer,
+            chunk_ids=[
+                chunk_id for span in context.spans for chunk_id in span.metadata["_ids"]
+            ],
+            cost=time.perf_counter() - start,
+        )
+
+    print(answer_cache.report())
 
 
 if __name__ == "__main__":
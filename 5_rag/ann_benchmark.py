@@ -0,0 +1,90 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from genai_utils.local_vector_store import LOCAL_INDEX_DIR, LocalVectorStore
+
+COLLECTION_NAME = "learning_langchain"
+# nodejs.pdf alone is a few hundred chunks; jittered copies of its embeddings
+# stand in for "several books plus the chaidocs crawl"
+TARGET_VECTORS = 100_000
+JITTER = 0.5  # norm of the noise added to a copy, relative to the unit vector
+QUERIES = 200
+K = 10
+NPROBES = [1, 2, 4, 8, 16, 32, 64]
+
+
+def _unit(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def project_vectors():
+    """
+    Chunk embeddings of the local index (built by 1_simple_rag.index_documents()
+    with VECTOR_BACKEND=local), or clustered random ones if there is none yet.
+    """
+    path = LOCAL_INDEX_DIR / COLLECTION_NAME
+    if (path / "vectors.npy").exists():
+        store = LocalVectorStore.load(path, embedding=None)
+        print(f"📦 {len(store)} chunk embeddings from {path}")
+        return np.asarray(store._vectors, dtype=np.float32)
+
+    print(f"⚠️ No local index at {path}, using random clustered vectors instead.")
+    rng = np.random.default_rng(1)
+    centers = rng.standard_normal((50, 768)).astype(np.float32)
+    return _unit(centers[rng.integers(50, size=300)] + rng.standard_normal((300, 768)))
+
+
+def scale_up(base, n, rng):
+    copies = base[rng.integers(len(base), size=n)]
+    noise = rng.standard_normal(copies.shape).astype(np.float32)
+    return _unit(copies + JITTER * noise / np.sqrt(base.shape[1]))
+
+
+def timed(search, queries):
+    start = time.perf_counter()
+    results = [search(query) for query in queries]
+    return results, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def recall(results, truth):
+    hits = [len(set(r) & set(t)) / len(t) for r, t in zip(results, truth)]
+    return sum(hits) / len(hits)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    base = project_vectors()
+    vectors = scale_up(base, TARGET_VECTORS, rng)
+    queries = scale_up(base, QUERIES, rng)
+
+    store = LocalVectorStore(embedding=None)
+    store._vectors = vectors
+    store._ids = [str(i) for i in range(len(vectors))]
+
+    truth, exact_ms = timed(lambda q: list(store._top_k(q, K, exact=True)[0]), queries)
+    print(f"\n🔢 {len(vectors):,} vectors x {vectors.shape[1]} dims, recall@{K}")
+    print(f"  exact        recall 1.000  {exact_ms:7.2f} ms/query")
+
+    start = time.perf_counter()
+    ann = store.build_ann()
+    print(
+        f"  IVF-PQ build  {time.perf_counter() - start:.1f} s "
+        f"({ann.n_lists} lists, {ann.codes.shape[1]} bytes/vector)"
+    )
+
+    for nprobe in NPROBES:
+        results, ann_ms = timed(
+            lambda q: list(store._top_k(q, K, nprobe=nprobe)[0]), queries
+        )
+        print(
+            f"  nprobe={nprobe:<4}  recall {recall(results, truth):.3f}  "
+            f"{ann_ms:7.2f} ms/query  ({exact_ms / ann_ms:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pypdf import PdfReader, PdfWriter
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from genai_utils.pdf_pipeline import iter_pdf_chunks
+
+PDF_PATH = Path(__file__).resolve().parent.parent / "nodejs.pdf"
+SYNTHETIC_PAGES = 2000
+
+
+def current_path(pdf_path):
+    """What load_and_split_pdf does today: load every page, then split."""
+    docs = PyPDFLoader(str(pdf_path)).load()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    return len(splitter.split_documents(docs))
+
+
+def pipeline_path(pdf_path):
+    # Chunks are consumed as they stream in, like an ingestion loop would
+    return sum(1 for _ in iter_pdf_chunks(pdf_path))
+
+
+def make_synthetic_pdf(pages, source=PDF_PATH):
+    """Repeat the pages of nodejs.pdf until the document has `pages` pages."""
+    reader = PdfReader(source)
+    writer = PdfWriter()
+    for i in range(pages):
+        writer.add_page(reader.pages[i % len(reader.pages)])
+
+    path = Path(tempfile.gettempdir()) / f"synthetic_{pages}_pages.pdf"
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
+def run_one(mode, pdf_path):
+    """Runs in a fresh interpreter so peak RSS belongs to this path only."""
+    start = time.perf_counter()
+    chunks = (current_path if mode == "current" else pipeline_path)(pdf_path)
+    elapsed = time.perf_counter() - start
+
+    print(
+        json.dumps(
+            {
+                "pages": len(PdfReader(pdf_path).pages),
+                "chunks": chunks,
+                "seconds": elapsed,
+                # ru_maxrss is in KiB on Linux
+                "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                / 1024,
+                "worker_peak_rss_mb": resource.getrusage(
+                    resource.RUSAGE_CHILDREN
+                ).ru_maxrss
+                / 1024,
+            }
+        )
+    )
+
+
+def measure(mode, pdf_path):
+    output = subprocess.run(
+        [sys.executable, __file__, "--run", mode, str(pdf_path)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    for pdf_path in [PDF_PATH, make_synthetic_pdf(SYNTHETIC_PAGES)]:
+        print(f"\n📄 {pdf_path.name}")
+        for mode in ["current", "pipeline"]:
+            result = measure(mode, pdf_path)
+            print(
+                f"  {mode:<9} {result['pages']:>5} pages  {result['chunks']:>6} chunks  "
+                f"{result['pages'] / result['seconds']:>8.1f} pages/sec  "
+                f"peak RSS {result['peak_rss_mb']:.0f} MB "
+                f"(workers {result['worker_peak_rss_mb']:.0f} MB)"
+            )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        run_one(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -1,40 +1,36 @@
+import sys
 from pathlib import Path
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
 
 from langchain_qdrant import QdrantVectorStore
 
-pdf_path = Path(__file__).parent / "nodejs.pdf"
-
-loader = PyPDFLoader(file_path=pdf_path)
-docs = loader.load()
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from genai_utils.embedding_cache import OPENAI_BATCH_SIZE, CachedEmbeddings
+from genai_utils.incremental_ingest import sync_pdf_to_qdrant
 
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1000,
-    chunk_overlap=200,
+pdf_path = Path(__file__).parent / "nodejs.pdf"
+# Own collection: learning_langchain holds the Gemini (models/embedding-001)
+# vectors the other RAG scripts search, and can't take these
+COLLECTION_NAME = "learning_langchain_openai"
+
+embedder = CachedEmbeddings(
+    OpenAIEmbeddings(model="text-embedding-3-large", api_key=""),
+    model="text-embedding-3-large",
+    batch_size=OPENAI_BATCH_SIZE,
 )
 
-split_docs = text_splitter.split_documents(documents=docs)
 
-embedder = OpenAIEmbeddings(model="text-embedding-3-large", api_key="")
+if __name__ == "__main__":
+    # Only new/changed chunks are embedded and upserted, removed ones are deleted
+    stats = sync_pdf_to_qdrant(pdf_path, embedder, collection_name=COLLECTION_NAME)
+    print(f"Injection Done: +{len(stats['added'])} / -{len(stats['deleted'])} chunks")
 
-# vector_store = QdrantVectorStore.from_documents(
-#     documents=[],
-#     url="http://localhost:6333",e:\Downloads\diagram-export-27-4-2025-7_16_31-pm.svg
-#     collection_name="learning_langchain",
-#     embedding=embedder
-# )
-
-# vector_store.add_documents(documents=split_docs)
-print("Injection Done")
-
-retriver = QdrantVectorStore.from_existing_collection(
-    url="http://localhost:6333",
-    collection_name="learning_langchain",
-    embedding=embedder,
-)
+    retriver = QdrantVectorStore.from_existing_collection(
+        url="http://localhost:6333",
+        collection_name=COLLECTION_NAME,
+        embedding=embedder,
+    )
 
-search_result = retriver.similarity_search(query="What is FS Module?")
+    search_result = retriver.similarity_search(query="What is FS Module?")
 
-print("Relevant Chunks", search_result)
+    print("Relevant Chunks", search_result)
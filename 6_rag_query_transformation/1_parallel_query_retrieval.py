@@ -1,12 +1,16 @@
 from pathlib import Path
 from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_qdrant import QdrantVectorStore
 from openai import OpenAI
 import os
 import ast
 import json
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from genai_utils.embedding_cache import CachedEmbeddings
+from genai_utils.incremental_ingest import default_splitter
 
 # adding google credentials for embeddings to work
 os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = (
@@ -24,26 +28,35 @@ client = OpenAI(
 # 1. Load and split PDF
 pdf_path = Path(__file__).parent.parent / "nodejs.pdf"
 loader = PyPDFLoader(pdf_path)
-docs = loader.load()
 
-# Split document into chunks
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1000,
-    chunk_overlap=200,
+# Pages are read lazily and split one at a time (1000/200), so neither the
+# pages nor the chunks are ever all in memory at once. Same per-page
+# splitter as sync_documents and the chunk artifact, so the chunks (text,
+# start_index, point ids) match theirs and the id-keyed lookups find them
+splitter = default_splitter()
+split_docs = (
+    chunk for page in loader.lazy_load() for chunk in splitter.split_documents([page])
 )
-split_docs = text_splitter.split_documents(documents=docs)
 
-# 2. Create an embedder
-embedder = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+# 2. Create an embedder (cached on disk, so nothing is embedded twice)
+embedder = CachedEmbeddings(
+    GoogleGenerativeAIEmbeddings(model="models/embedding-001"),
+    model="models/embedding-001",
+)
 
 # Only run the below once to insert data into Qdrant
+# from genai_utils.incremental_ingest import chunk_id_for
+# from genai_utils.streaming_chunker import batched
 # vector_store = QdrantVectorStore.from_documents(
-#     documents=split_docs,
+#     documents=[],
 #     embedding=embedder,
 #     url="http://localhost:6333",
 #     collection_name="learning_node_js",
 # )
-# vector_store.add_documents(documents=split_docs)
+# for batch in batched(split_docs, 100):
+#     vector_store.add_documents(
+#         documents=batch, ids=[chunk_id_for(chunk) for chunk in batch]
+#     )
 # print("📄 PDF Ingestion Complete!\n")
 
 # Connect to existing Qdrant vector store
@@ -1,12 +1,28 @@
 import os
-import json
+import time
 from pathlib import Path
-from collections import defaultdict
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_qdrant import QdrantVectorStore
 from openai import OpenAI
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from genai_utils.batch_search import batch_similarity_search
+from genai_utils.chunk_artifact import ChunkArtifact
+from genai_utils.llm_cache import (
+    DEFAULT_LLM_CACHE_PATH,
+    REPLY_TTL,
+    CachedChatClient,
+    reply_json,
+)
+from genai_utils.local_vector_store import open_vector_store
+from genai_utils.query_expansion import prf_expansion
+from genai_utils.rrf import RRF_K, HitIds, reciprocal_rank_fusion
+from genai_utils.streaming import iter_chat_text, print_stream, timing_report
+
+# "llm": Gemini paraphrases; "local": pseudo-relevance feedback, no LLM call
+QUERY_EXPANSION = os.getenv("QUERY_EXPANSION", "llm")
 
 
 # Function to load environment variables
@@ -24,11 +40,14 @@ def load_environment_variables():
     return gemini_api_key
 
 
-# Function to initialize OpenAI client
+# Function to initialize OpenAI client (identical cache=True requests are served from disk)
 def initialize_openai_client(api_key):
-    return OpenAI(
-        api_key=api_key,
-        base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+    return CachedChatClient(
+        OpenAI(
+            api_key=api_key,
+            base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+        ),
+        path=DEFAULT_LLM_CACHE_PATH,
     )
 
 
@@ -49,37 +68,40 @@ def expand_query(client, user_query):
     query_expansion = client.chat.completions.create(
         model="gemini-2.5-flash-preview-04-17",
         messages=[{"role": "user", "content": augmentation_prompt}],
+        cache=True,
+        ttl=REPLY_TTL,
+        # A reply that isn't a JSON list is re-asked next time, not cached
+        cache_if=lambda response: isinstance(reply_json(response), list),
     )
-    try:
-        res = json.loads(query_expansion.choices[0].message.content)
-        return res if isinstance(res, list) else []
-    except json.JSONDecodeError:
+    res = reply_json(query_expansion)
+    if res is None:
         print("Error decoding JSON from Gemini response.")
-        return []
+    return res if isinstance(res, list) else []
 
 
 # Function to retrieve relevant documents using Reciprocal Rank Fusion
-def retrieve_relevant_docs(retriever, similar_queries, k=60, top_k=10):
-    doc_scores = defaultdict(float)
-    doc_text_map = {}
-
-    for query in similar_queries:
-        docs = retriever.similarity_search(query=query, k=top_k)
-        for rank, doc in enumerate(docs):
-            key = doc.page_content
-            doc_text_map[key] = doc
-            doc_scores[key] += 1 / (k + rank + 1)
-
-    # Sort documents by RRF score
-    ranked_docs = sorted(doc_scores.items(), key=lambda x: x[1], reverse=True)
-    unique_docs = [doc_text_map[text] for text, _ in ranked_docs]
-
-    return "\n\n".join(doc.page_content for doc in unique_docs[:top_k])
+def retrieve_relevant_docs(
+    retriever, similar_queries, chunks, k=RRF_K, top_k=10, weights=None
+):
+    # All variants are embedded in one request and searched in one batch.
+    # Hits are fused as integer chunk indexes of the artifact (same point ids
+    # as the collection; hits it doesn't know get ids of their own),
+    # `weights` optionally weighs each query variant.
+    hit_ids = HitIds(chunks)
+    ranked_lists = [
+        [hit_ids.id_of(doc) for doc in docs]
+        for docs in batch_similarity_search(retriever, similar_queries, k=top_k)
+    ]
+    chunk_ids, _ = reciprocal_rank_fusion(
+        ranked_lists, k=k, top_k=top_k, weights=weights
+    )
+    return "\n\n".join(hit_ids.text(chunk_id) for chunk_id in chunk_ids)
 
 
-# Function to get the OpenAI response
+# Function to get the OpenAI response, printed as it streams in
 def get_openai_response(client, context, user_query):
-    response = client.chat.completions.create(
+    start = time.perf_counter()
+    stream = client.chat.completions.create(
         model="gemini-2.5-flash-preview-04-17",
         messages=[
             {
@@ -91,8 +113,11 @@ def get_openai_response(client, context, user_query):
                 "content": f"Context:\n{context}\n\nQuestion: {user_query}",
             },
         ],
+        stream=True,
     )
-    return response.choices[0].message.content
+    answer, timings = print_stream(iter_chat_text(stream), start)
+    print(timing_report(timings))
+    return answer
 
 
 # Main function to run the workflow
@@ -101,28 +126,27 @@ def main(pdf_path, user_query):
     gemini_api_key = os.getenv("GEMINI_API_KEY")
     client = initialize_openai_client(gemini_api_key)
 
-    # Load and split PDF
-    split_docs = load_and_split_pdf(pdf_path)
+    # Parsed chunks come from the artifact written at ingestion time; it is only
+    # mmapped when chunk text is actually read, so no PDF parsing per query
+    chunks = ChunkArtifact.for_pdf(pdf_path)
 
     # Create embedder
     embedder = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
 
-    # Connect to existing Qdrant vector store
-    retriever = QdrantVectorStore.from_existing_collection(
-        url="http://localhost:6333",
-        collection_name="learning_langchain",
-        embedding=embedder,
-    )
+    # Connect to the existing collection (Qdrant, or in-process with VECTOR_BACKEND=local)
+    retriever = open_vector_store("learning_langchain", embedder)
 
     # Expand user query
-    similar_queries = expand_query(client, user_query)
+    if QUERY_EXPANSION == "local":
+        similar_queries = prf_expansion(retriever, user_query, bm25=chunks.bm25)
+    else:
+        similar_queries = expand_query(client, user_query)
 
     # Retrieve relevant documents using RRF
-    context = retrieve_relevant_docs(retriever, similar_queries)
+    context = retrieve_relevant_docs(retriever, similar_queries, chunks)
 
     # Get OpenAI response
-    response = get_openai_response(client, context, user_query)
-    print(response)
+    get_openai_response(client, context, user_query)
 
 
 # Run the script
@@ -0,0 +1,95 @@
+import sys
+from pathlib import Path
+
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from genai_utils.batch_search import batch_similarity_search
+from genai_utils.embedding_cache import CachedEmbeddings
+from genai_utils.local_vector_store import open_vector_store
+from genai_utils.query_expansion import gated_expansion
+from parallel_query_retrieval_optimised import (
+    expand_query,
+    initialize_openai_client,
+    load_environment_variables,
+)
+
+COLLECTION_NAME = "learning_langchain"
+EMBED_MODEL = "models/embedding-001"
+K = 4
+# Used when no query log file (one query per line) is given
+SAMPLE_QUERIES = [
+    "What is the event loop?",
+    "How do I read a file with fs.readFile?",
+    "what are streams",
+    "How does require resolve modules?",
+    "What is a Buffer?",
+    "how to make a server",
+    "What does process.nextTick do?",
+    "error handling",
+]
+
+
+def load_queries(path=None):
+    if path is None:
+        return SAMPLE_QUERIES
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def retrieved_ids(retriever, queries, hits=()):
+    return {doc.metadata["_id"] for doc in hits} | {
+        doc.metadata["_id"]
+        for docs in batch_similarity_search(retriever, queries, k=K)
+        for doc in docs
+    }
+
+
+def main(path=None):
+    client = initialize_openai_client(load_environment_variables())
+    embedder = CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(model=EMBED_MODEL), model=EMBED_MODEL
+    )
+    retriever = open_vector_store(COLLECTION_NAME, embedder)
+    queries = load_queries(path)
+
+    totals = {"always": [0, 0], "gated": [0, 0]}  # [LLM calls, searches]
+    overlaps = []
+    for user_query in queries:
+        # Always-expand baseline: one LLM call, one search per variant
+        always = expand_query(client, user_query) or [user_query]
+        totals["always"][0] += 1
+        totals["always"][1] += len(always)
+
+        hits, variants, confidence = gated_expansion(
+            retriever, user_query, lambda _: expand_query(client, user_query), k=K
+        )
+        totals["gated"][0] += confidence["expanded"]
+        totals["gated"][1] += 1 + len(variants)  # the gating search is reused
+
+        baseline = retrieved_ids(retriever, always)
+        gated = retrieved_ids(retriever, variants, hits)
+        overlap = len(baseline & gated) / (len(baseline) or 1)
+        overlaps.append(overlap)
+        print(
+            f"{'expand' if confidence['expanded'] else 'skip  '} "
+            f"top {confidence['top']:.3f} margin {confidence['margin']:.3f} "
+            f"overlap {overlap:.0%}  {user_query}"
+        )
+
+    llm_saved = totals["always"][0] - totals["gated"][0]
+    searches_saved = totals["always"][1] - totals["gated"][1]
+    print(f"\n📊 {len(queries)} queries")
+    print(
+        f"LLM calls: {totals['always'][0]} → {totals['gated'][0]} ({llm_saved} saved)"
+    )
+    print(
+        f"Searches:  {totals['always'][1]} → {totals['gated'][1]} ({searches_saved} saved)"
+    )
+    print(
+        f"Answer-context overlap with always-expand: {sum(overlaps) / len(overlaps):.0%}"
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -1,10 +1,13 @@
-from langchain_community.document_loaders import PyPDFLoader
 from pathlib import Path
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from dotenv import load_dotenv
 import os
-from langchain_qdrant import QdrantVectorStore
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from genai_utils.embedding_cache import CachedEmbeddings
+from genai_utils.chunk_artifact import build_chunk_artifact
+from genai_utils.local_vector_store import open_vector_store, sync_pdf
 
 load_dotenv()
 
@@ -12,39 +15,39 @@ load_dotenv()
 pdf_path = Path(__file__).parent.parent / "nodejs.pdf"
 # print(pdf_path)
 
-loader = PyPDFLoader(file_path=pdf_path)
-docs = loader.load()  # the load() gives a list of document. so it is a list datatype
-# print(docs[0])
-
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-
-split_docs = text_splitter.split_documents(documents=docs)
-
-print("DOCS", len(docs))
-print("SPLIT", len(split_docs))
 
+# Cached so re-running the ingestion only embeds chunks that changed
+embedder = CachedEmbeddings(
+    GoogleGenerativeAIEmbeddings(model="models/embedding-001"),
+    model="models/embedding-001",
+)
 
-embedder = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
 
+# The chunking pipeline starts worker processes, which re-import this file on
+# Windows/macOS, so the ingestion only runs when executed as a script
+if __name__ == "__main__":
+    # Incremental ingestion: pages and chunks are fingerprinted in a manifest, so a
+    # re-run only embeds/upserts what changed and deletes chunks that disappeared.
+    # A collection indexed without a manifest (or by another embedding model) is
+    # only dropped and rebuilt when asked to, with --rebuild
+    stats = sync_pdf(
+        pdf_path,
+        embedder,
+        collection_name="learning_langchain",
+        rebuild="--rebuild" in sys.argv,
+    )
 
-# vector_store = QdrantVectorStore.from_documents(
-#     documents=[],
-#     url="http://localhost:6333",
-#     collection_name="learning_langchain_PQR_node",
-#     embedding=embedder
-# )
+    print("DOCS", stats["pages"])
+    print("SPLIT", stats["chunks"])
+    print(f"Injection Done: +{len(stats['added'])} / -{len(stats['deleted'])} chunks")
 
-# vector_store.add_documents(documents=split_docs)
-# print("Injection Done")
+    # Persist the parsed chunks so query scripts never re-parse the PDF
+    build_chunk_artifact(pdf_path)
 
-retriver = QdrantVectorStore.from_existing_collection(
-    url="http://localhost:6333",
-    collection_name="learning_langchain",
-    embedding=embedder,
-)
+    retriver = open_vector_store("learning_langchain", embedder)
 
-# relevant_chunks = retriver.similarity_search(
-#     query="what is Multi-Head Attention?"
-# )
+    # relevant_chunks = retriver.similarity_search(
+    #     query="what is Multi-Head Attention?"
+    # )
 
-# print("Relevant Chunks: ", relevant_chunks)
+    # print("Relevant Chunks: ", relevant_chunks)
@@ -1,11 +1,43 @@
 import os
-import json
+import asyncio
+import time
 from pathlib import Path
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_qdrant import QdrantVectorStore
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from genai_utils.async_rag import AsyncRetriever, iter_list_strings, iter_stream_text
+from genai_utils.batch_search import batch_similarity_search
+from genai_utils.chunk_artifact import ChunkArtifact
+from genai_utils.compression import compress_context, compression_report
+from genai_utils.context_packer import pack_context
+from genai_utils.embedding_cache import CachedEmbeddings
+from genai_utils.llm_cache import (
+    DEFAULT_LLM_CACHE_PATH,
+    REPLY_TTL,
+    CachedChatClient,
+    reply_json,
+)
+from genai_utils.local_vector_store import open_vector_store
+from genai_utils.query_expansion import (
+    expansion_gate,
+    gated_expansion,
+    prf_variants,
+)
+from genai_utils.streaming import (
+    aprint_stream,
+    iter_chat_text,
+    print_stream,
+    timing_report,
+)
+
+# Token budget for the retrieved context sent with the question
+CONTEXT_MAX_TOKENS = 2000
+# "llm": Gemini paraphrases; "local": pseudo-relevance feedback, no LLM call
+QUERY_EXPANSION = os.getenv("QUERY_EXPANSION", "llm")
 
 
 # Function to load environment variables
@@ -22,9 +54,19 @@ def load_environment_variables():
         raise ValueError("GEMINI_API_KEY environment variable is not set.")
     return gemini_api_key
 
-# Function to initialize OpenAI client
+# Function to initialize OpenAI client (identical cache=True requests are served from disk)
 def initialize_openai_client(api_key):
-    return OpenAI(
+    return CachedChatClient(
+        OpenAI(
+            api_key=api_key,
+            base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+        ),
+        path=DEFAULT_LLM_CACHE_PATH,
+    )
+
+
+def initialize_async_openai_client(api_key):
+    return AsyncOpenAI(
         api_key=api_key,
         base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
     )
@@ -38,48 +80,186 @@ def load_and_split_pdf(pdf_path):
     return text_splitter.split_documents(documents=docs)
 
 
-# Function to expand the query
-def expand_query(client, user_query):
-    augmentation_prompt = f"""Generate 3 semantically different variations of this question for better retrieval:
+def build_augmentation_prompt(user_query):
+    return f"""Generate 3 semantically different variations of this question for better retrieval:
     "{user_query}"
     Return a json with Python list of 3 strings in that and dont wrap output in ```json give me directly ."""
 
+
+# Function to expand the query
+def expand_query(client, user_query):
+    augmentation_prompt = build_augmentation_prompt(user_query)
+
     query_expansion = client.chat.completions.create(
         model="gemini-2.5-flash-preview-04-17",
         messages=[{"role": "user", "content": augmentation_prompt}],
+        cache=True,
+        ttl=REPLY_TTL,
+        # A reply that isn't a JSON object is re-asked next time, not cached
+        cache_if=lambda response: isinstance(reply_json(response), dict),
     )
-    res = json.loads(query_expansion.choices[0].message.content)
-    return res.get("output", [])
+    res = reply_json(query_expansion)
+    return res.get("output", []) if isinstance(res, dict) else []
 
 
 # Function to retrieve relevant documents from Qdrant
-def retrieve_relevant_docs(retriever, similar_queries):
-    relevant_docs = []
-    for query in similar_queries:
-        docs = retriever.similarity_search(query=query)
+def retrieve_relevant_docs(retriever, similar_queries, hits=()):
+    # All variants are embedded in one request and searched in one batch;
+    # `hits` are results already in hand (the raw query's, from the gate)
+    # Returns the packed context spans (texts)
+    relevant_docs = list(hits)
+    for docs in batch_similarity_search(retriever, similar_queries):
         relevant_docs.extend(docs)
 
-    # Remove duplicates
-    unique_docs = list({doc.page_content: doc for doc in relevant_docs}.values())
-    return "\n\n".join(doc.page_content for doc in unique_docs)
+    return pack_unique_docs(relevant_docs)
+
+
+def pack_unique_docs(relevant_docs, max_tokens=CONTEXT_MAX_TOKENS):
+    # Duplicates and overlapping neighbours (chunk_overlap=200) are merged into
+    # one span per stretch of page, then packed into a fixed token budget.
+    # Returns the text of each packed span.
+    context = pack_context(relevant_docs, max_tokens=max_tokens)
+    print(
+        f"🧮 Context: {context.tokens} tokens "
+        f"({context.input_tokens - context.tokens} saved of {context.input_tokens})"
+    )
+    return [span.page_content for span in context.spans]
+
 
+def build_answer_messages(context, user_query):
+    return [
+        {
+            "role": "system",
+            "content": "You are a helpful assistant knowledgeable in Node.js.",
+        },
+        {
+            "role": "user",
+            "content": f"Context:\n{context}\n\nQuestion: {user_query}",
+        },
+    ]
 
-# Function to get the OpenAI response
+
+# Function to get the OpenAI response, printed as it streams in
 def get_openai_response(client, context, user_query):
-    response = client.chat.completions.create(
+    start = time.perf_counter()
+    stream = client.chat.completions.create(
+        model="gemini-2.5-flash-preview-04-17",
+        messages=build_answer_messages(context, user_query),
+        stream=True,
+    )
+    answer, timings = print_stream(iter_chat_text(stream), start)
+    print(timing_report(timings))
+    return answer
+
+
+# Async version: stream the expansion and yield each variant once it is parsed
+async def expand_query_stream(client, user_query):
+    stream = await client.chat.completions.create(
         model="gemini-2.5-flash-preview-04-17",
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful assistant knowledgeable in Node.js.",
-            },
-            {
-                "role": "user",
-                "content": f"Context:\n{context}\n\nQuestion: {user_query}",
-            },
-        ],
+        messages=[{"role": "user", "content": build_augmentation_prompt(user_query)}],
+        stream=True,
+    )
+    async for variant in iter_list_strings(iter_stream_text(stream)):
+        yield variant
+
+
+async def get_openai_response_async(client, context, user_query):
+    """Streamed answer, printed as it arrives; returns (answer, timings)."""
+    start = time.perf_counter()
+    stream = await client.chat.completions.create(
+        model="gemini-2.5-flash-preview-04-17",
+        messages=build_answer_messages(context, user_query),
+        stream=True,
+    )
+    return await aprint_stream(iter_stream_text(stream), start)
+
+
+async def search_expansion(client, retriever, user_query, k, searches):
+    # Every variant is searched as soon as it has been parsed from the stream
+    async for variant in expand_query_stream(client, user_query):
+        searches.append(asyncio.create_task(retriever.search(variant, k)))
+
+
+async def cancel_tasks(tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def answer_async(
+    client, retriever, user_query, k=4, expansion=QUERY_EXPANSION, bm25=None
+):
+    """
+    Confidence-gated expansion, retrieval and generation on one event loop:
+    the expansion is streamed while the original query is searched, every
+    variant being searched as soon as it has been parsed, and all of it is
+    cancelled if the original query's top hit turns out a clear winner.
+    With expansion="local" the variants come from pseudo-relevance feedback
+    on the raw query's hits instead, once they are in (`bm25`: the chunk
+    artifact's index, for idf weighting).
+
+    The answer is printed as it streams in. Returns it and per-stage timings
+    in seconds (first_token: from the question to the first answer token),
+    plus the gate's confidence statistics.
+    """
+    start = time.perf_counter()
+    searches = []
+    pending = []
+    if expansion != "local":
+        pending.append(
+            asyncio.create_task(
+                search_expansion(client, retriever, user_query, k, searches)
+            )
+        )
+
+    try:
+        raw_results = await retriever.search_with_score(user_query, k)
+    except BaseException:
+        await cancel_tasks(pending + searches)
+        raise
+    confidence = expansion_gate([score for _, score in raw_results])
+
+    if not confidence["expanded"]:
+        # Clear winner: the expansion (and the searches it started) is wasted
+        await cancel_tasks(pending + searches)
+        searches = []
+    elif expansion == "local":
+        for variant in prf_variants(user_query, raw_results, bm25=bm25):
+            searches.append(asyncio.create_task(retriever.search(variant, k)))
+    else:
+        await asyncio.gather(*pending)
+    expanded = time.perf_counter()
+
+    results = [[doc for doc, _ in raw_results]] + await asyncio.gather(*searches)
+    retrieved = time.perf_counter()
+
+    # Keep only the sentences that answer the question, and their neighbours;
+    # the sentence embeddings are a blocking call, so it runs in a thread
+    spans = pack_unique_docs([doc for docs in results for doc in docs])
+    compressed = await asyncio.to_thread(
+        compress_context, user_query, spans, retriever.embedding
     )
-    return response.choices[0].message.content
+    print(compression_report(compressed))
+    context = "\n\n".join(text for text in compressed.texts if text)
+    compressed_at = time.perf_counter()
+
+    answer, generation = await get_openai_response_async(client, context, user_query)
+    done = time.perf_counter()
+
+    return answer, {
+        "expansion": expanded - start,
+        # Only what retrieval added after the expansion finished
+        "retrieval": retrieved - expanded,
+        "compression": compressed_at - retrieved,
+        "generation": done - compressed_at,
+        # Everything up to the first streamed answer token
+        "first_token": done
+        - start
+        - (generation["total"] - generation["first_token"]),
+        "total": done - start,
+        "queries": len(results),
+        "confidence": confidence,
+    }
 
 
 # Main function to run the workflow
@@ -88,32 +268,78 @@ def main(pdf_path, user_query):
     gemini_api_key = os.getenv("GEMINI_API_KEY")
     client = initialize_openai_client(gemini_api_key)
 
-    # Load and split PDF
-    split_docs = load_and_split_pdf(pdf_path)
+    # Parsed chunks come from the artifact written at ingestion time; it is only
+    # mmapped when chunk text is actually read, so no PDF parsing per query
+    chunks = ChunkArtifact.for_pdf(pdf_path)
 
-    # Create embedder
-    embedder = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-
-    # Connect to existing Qdrant vector store
-    retriever = QdrantVectorStore.from_existing_collection(
-        url="http://localhost:6333",
-        collection_name="learning_langchain",
-        embedding=embedder,
+    # Create embedder (cached on disk: repeated queries and sentences are free)
+    embedder = CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(model="models/embedding-001"),
+        model="models/embedding-001",
     )
 
-    # Expand user query
-    similar_queries = expand_query(client, user_query)
+    # Connect to the existing collection (Qdrant, or in-process with VECTOR_BACKEND=local)
+    retriever = open_vector_store("learning_langchain", embedder)
+
+    # Expand user query, unless the raw query already retrieves a clear winner.
+    # Local expansion uses the raw query's hits as feedback, no extra search.
+    def expand(results):
+        if QUERY_EXPANSION == "local":
+            return prf_variants(user_query, results, bm25=chunks.bm25)
+        return expand_query(client, user_query)
+
+    hits, similar_queries, confidence = gated_expansion(retriever, user_query, expand)
+    print(
+        f"🎯 Top hit {confidence['top']:.3f}, margin {confidence['margin']:.3f}: "
+        + ("expanded" if confidence["expanded"] else "expansion skipped")
+    )
 
     # Retrieve relevant documents
-    context = retrieve_relevant_docs(retriever, similar_queries)
+    spans = retrieve_relevant_docs(retriever, similar_queries, hits)
+
+    # Keep only the sentences that answer the question, and their neighbours
+    compressed = compress_context(user_query, spans, embedder)
+    print(compression_report(compressed))
+    context = "\n\n".join(text for text in compressed.texts if text)
 
     # Get OpenAI response
-    response = get_openai_response(client, context, user_query)
-    print(response)
+    get_openai_response(client, context, user_query)
+
+
+async def main_async(pdf_path, user_query):
+    gemini_api_key = load_environment_variables()
+    client = initialize_async_openai_client(gemini_api_key)
+
+    # Cached on disk: repeated queries and compressed sentences are free
+    embedder = CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(model="models/embedding-001"),
+        model="models/embedding-001",
+    )
+    retriever = AsyncRetriever(embedder, "learning_langchain")
+    bm25 = ChunkArtifact.for_pdf(pdf_path).bm25 if QUERY_EXPANSION == "local" else None
+    try:
+        response, timings = await answer_async(
+            client, retriever, user_query, bm25=bm25
+        )
+    finally:
+        await retriever.close()
+
+    confidence = timings["confidence"]
+    print(
+        f"\n🎯 Top hit {confidence['top']:.3f}, margin {confidence['margin']:.3f}: "
+        + ("expanded" if confidence["expanded"] else "expansion skipped")
+    )
+    print(
+        f"⏱️ {timings['queries']} queries | expansion {timings['expansion']:.2f}s, "
+        f"retrieval +{timings['retrieval']:.2f}s, compression {timings['compression']:.2f}s, "
+        f"generation {timings['generation']:.2f}s, "
+        f"first token {timings['first_token']:.2f}s, total {timings['total']:.2f}s"
+    )
+    return response, timings
 
 
 # Run the script
 if __name__ == "__main__":
     pdf_path = Path(__file__).parent.parent / "nodejs.pdf"
     user_query = input("Ask a question about Node.js: ")
-    main(pdf_path, user_query)
+    asyncio.run(main_async(pdf_path, user_query))
@@ -1,16 +1,26 @@
 from dotenv import load_dotenv
 import os
-from langchain_qdrant import QdrantVectorStore
+import time
 from openai import OpenAI
+from pathlib import Path
+import sys
 from indexing_chunking import topic_urls
 from indexing_chunking import embedder
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from genai_utils.llm_cache import DEFAULT_LLM_CACHE_PATH, REPLY_TTL, CachedChatClient
+from genai_utils.local_vector_store import open_vector_store
+from genai_utils.semantic_cache import SemanticCache
+
 load_dotenv()
 
 api_key = os.getenv("GEMINI_API_KEY")
-LLM = OpenAI(
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-    api_key=api_key
+LLM = CachedChatClient(
+    OpenAI(
+        base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+        api_key=api_key
+    ),
+    path=DEFAULT_LLM_CACHE_PATH,
 )
 
 def classify_topic(user_input):
@@ -30,12 +40,19 @@ def classify_topic(user_input):
         Return **only** the topic name from the list above. Do not include any explanations or extra text.
         """
     
+    # Only a reply naming one of the topics is reused
+    def names_a_topic(response):
+        return (response.choices[0].message.content or "").strip() in topics
+
     response = LLM.chat.completions.create(
         model="gemini-2.0-flash",
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": user_input}
-        ]
+        ],
+        cache=True,
+        ttl=REPLY_TTL,
+        cache_if=names_a_topic,
     )
 
     # print("-----> ", response.choices[0].message.content)
@@ -57,25 +74,36 @@ SYSTEM_PROMPT = """
     Source: link
 """
 
+# Near-identical questions skip routing, retrieval and generation
+answer_cache = SemanticCache(namespace="chaicode_docs")
+
 while True:
     user_input = input("👤 Ask Question: ")
     if user_input.lower() in ["exit", "quit"]:
+        print(answer_cache.report())
         break
 
+    start = time.perf_counter()
+    query_vector = embedder.embed_query(user_input)
+    cached = answer_cache.lookup(query_vector)
+    if cached:
+        print("🤖 Answer (cached): ", cached.answer)
+        continue
+
     topic = classify_topic(user_input)
     print(f"\n>> Routed to topic: {topic}")
 
-    retriver = QdrantVectorStore.from_existing_collection(
-        url="http://localhost:6333",
-        collection_name=topic,
-        embedding=embedder
-    )
+    retriver = open_vector_store(topic, embedder)
 
     relevant_chunks = retriver.similarity_search(query=user_input)
     # print(relevant_chunks)
     context = "\n\n".join([f"{doc.page_content}\n Source: {doc.metadata.get('source')}" for doc in relevant_chunks])
     formatted_prompt = SYSTEM_PROMPT.format(context=context)
 
+    # Only a reply naming one of the topics is reused
+    def names_a_topic(response):
+        return (response.choices[0].message.content or "").strip() in topics
+
     response = LLM.chat.completions.create(
         model="gemini-2.0-flash",
         messages=[
@@ -83,4 +111,11 @@ while True:
             {"role": "user", "content": user_input}
         ]
     )
-    print("🤖 Answer: ", response.choices[0].message.content)
\ No newline at end of file
+    print("🤖 Answer: ", response.choices[0].message.content)
+    answer_cache.put(
+        user_input,
+        query_vector,
+        response.choices[0].message.content,
+        chunk_ids=[doc.metadata["_id"] for doc in relevant_chunks],
+        cost=time.perf_counter() - start,
+    )
\ No newline at end of file
@@ -1,9 +1,14 @@
 from langchain_community.document_loaders import WebBaseLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from collections import defaultdict
 from langchain_openai import OpenAIEmbeddings
 from dotenv import load_dotenv
+from pathlib import Path
 import os
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from genai_utils.embedding_cache import OPENAI_BATCH_SIZE, CachedEmbeddings
+from genai_utils.streaming_chunker import stream_chunks
 
 load_dotenv()
 
@@ -52,22 +57,19 @@ for link in all_urls:
 
 
 api_key = os.getenv("OPENAI_API_KEY")
-embedder = OpenAIEmbeddings(model="text-embedding-3-small", api_key=api_key)
+embedder = CachedEmbeddings(
+    OpenAIEmbeddings(model="text-embedding-3-small", api_key=api_key),
+    model="text-embedding-3-small",
+    batch_size=OPENAI_BATCH_SIZE,
+)
 
 for topic, url in topic_urls.items():
     # print(f"Processing Topic {topic}")
     # print(url)
 
-    # load documents
+    # load documents lazily and chunk them as a stream, one page in memory at a time
     loader = WebBaseLoader(web_paths=url)
-    docs = loader.load()
-
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-
-    split_docs = text_splitter.split_documents(documents=docs)
-
-    # print("DOCS", len(docs))
-    # print("SPLIT", len(split_docs))
+    split_docs = stream_chunks(loader.lazy_load(), chunk_size=1000, chunk_overlap=200)
 
     # vector_store = QdrantVectorStore.from_documents(
     #     documents=[],
@@ -76,5 +78,10 @@ for topic, url in topic_urls.items():
     #     embedding=embedder
     # )
 
-    # vector_store.add_documents(documents=split_docs)
+    # from genai_utils.streaming_chunker import batched
+    # for batch in batched(split_docs, 100):
+    #     vector_store.add_documents(documents=batch)
+
+    # Or, for VECTOR_BACKEND=local (no Qdrant needed):
+    # LocalVectorStore.from_documents(list(split_docs), embedder, collection_name=topic)
     # print("Injection Done")
@@ -1,25 +1,339 @@
+import codecs
+import heapq
+import numbers
+import os
+from array import array
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+
+import regex
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only needed for "numpy" output and fast decode
+    np = None
+
+# GPT-4 style pre-tokenization: contractions, words, 1-3 digit numbers,
+# punctuation runs and whitespace. BPE merges never cross these boundaries.
+SPLIT_PATTERN = r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]++[\r\n]*|\s*[\r\n]|\s+(?!\S)|\s+"""
+SPLIT_RE = regex.compile(SPLIT_PATTERN)
+
+# Below this size spinning up worker processes costs more than it saves
+PARALLEL_MIN_CHARS = 1_000_000
+
+# How many distinct words encode() remembers
+WORD_CACHE_SIZE = 65_536
+
+# Token sequences at least this long are decoded with numpy gathers
+VECTORIZED_DECODE_MIN_TOKENS = 2048
+
+RETURN_TYPES = ("list", "array", "numpy")
+
+# Tokenizer shared by every task of an encode_batch() worker process
+_worker_tokenizer = None
+
+
+def _count_words(text):
+    """Count the pre-tokenized words of one corpus part (runs in a worker)."""
+    return Counter(SPLIT_RE.findall(text))
+
+
+def _init_worker(tokenizer):
+    global _worker_tokenizer
+    _worker_tokenizer = tokenizer
+
+
+def _encode_in_worker(text, return_type="list"):
+    return _worker_tokenizer.encode(text, return_type=return_type)
+
+
+def _split_corpus(text, parts):
+    """
+    Cut text into roughly equal parts. Cuts are only made right before a
+    whitespace that follows a non-whitespace char, so no word gets split.
+    """
+    size = len(text) // parts
+    bounds = [0]
+    for i in range(1, parts):
+        cut = max(i * size, bounds[-1])
+        while cut < len(text) and not (text[cut].isspace() and not text[cut - 1].isspace()):
+            cut += 1
+        bounds.append(cut)
+    bounds.append(len(text))
+    return [text[start:end] for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def _merge(ids, pair, new_id):
+    """Replace every occurrence of pair in ids with new_id."""
+    merged = []
+    i = 0
+    while i < len(ids):
+        if i < len(ids) - 1 and ids[i] == pair[0] and ids[i + 1] == pair[1]:
+            merged.append(new_id)
+            i += 2
+        else:
+            merged.append(ids[i])
+            i += 1
+    return merged
+
+
 class Tokenizer:
-    def encode(self, text):
-        encoded_text = []
-        splitted_text = list(text)
+    def __init__(self, cache_size=WORD_CACHE_SIZE):
+        # Byte-level base vocabulary: token ids 0-255 are the raw UTF-8 bytes
+        self.merges = {}  # (left_id, right_id) -> merged token id
+        self.vocab = {i: bytes([i]) for i in range(256)}
+        self.cache_size = cache_size
+        self._encode_word = lru_cache(maxsize=cache_size)(self._encode_word_uncached)
+        self._decode_table = None  # numpy (blob, offsets, lengths), built lazily
+
+    def __getstate__(self):
+        # The bound LRU wrapper can't be pickled (encode_batch with processes)
+        state = self.__dict__.copy()
+        del state["_encode_word"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._encode_word = lru_cache(maxsize=self.cache_size)(self._encode_word_uncached)
+
+    def train(self, text, vocab_size, num_workers=None):
+        """
+        Learn vocab_size - 256 BPE merges from text.
+
+        Words are counted once (in parallel for large corpora) and every merge
+        only touches the words that contain the merged pair. Pair frequencies
+        live in a max-heap with lazy invalidation: when a count changes a fresh
+        entry is pushed and stale ones are skipped when popped.
+        """
+        if vocab_size < 256:
+            raise ValueError("vocab_size must be at least 256 (the byte alphabet)")
+
+        word_counts = self._count_words(text, num_workers)
+        words = [list(word.encode("utf-8")) for word in word_counts]
+        freqs = list(word_counts.values())
+
+        pair_counts = defaultdict(int)
+        pair_words = defaultdict(set)  # pair -> indexes of words containing it
+        for index, ids in enumerate(words):
+            for pair in zip(ids, ids[1:]):
+                pair_counts[pair] += freqs[index]
+                pair_words[pair].add(index)
+
+        heap = [(-count, pair) for pair, count in pair_counts.items()]
+        heapq.heapify(heap)
 
-        for word in splitted_text:
-            encoded_word = []
-            for char in word:
-                encoded_word.append(ord(char))
-            encoded_text.extend(encoded_word)
-        return encoded_text
+        self.merges = {}
+        self.vocab = {i: bytes([i]) for i in range(256)}
+        next_id = 256
+
+        while next_id < vocab_size and heap:
+            neg_count, pair = heapq.heappop(heap)
+            if pair_counts.get(pair, 0) != -neg_count:
+                continue  # stale entry, the current count was pushed separately
+
+            self.merges[pair] = next_id
+            self.vocab[next_id] = self.vocab[pair[0]] + self.vocab[pair[1]]
+
+            changed = set()
+            for index in pair_words.pop(pair):
+                ids = words[index]
+                freq = freqs[index]
+                merged = _merge(ids, pair, next_id)
+                if len(merged) == len(ids):
+                    continue  # pair was merged away by an earlier merge in this word
+
+                for old in zip(ids, ids[1:]):
+                    pair_counts[old] -= freq
+                    changed.add(old)
+                for new in zip(merged, merged[1:]):
+                    pair_counts[new] += freq
+                    pair_words[new].add(index)
+                    changed.add(new)
+                words[index] = merged
+
+            for changed_pair in changed:
+                count = pair_counts[changed_pair]
+                if count > 0:
+                    heapq.heappush(heap, (-count, changed_pair))
+                else:
+                    del pair_counts[changed_pair]
+                    pair_words.pop(changed_pair, None)
+
+            next_id += 1
+
+        # Words cached with the old merges would now encode differently
+        self._encode_word.cache_clear()
+        self._decode_table = None
+
+    def _count_words(self, text, num_workers=None):
+        num_workers = num_workers or os.cpu_count() or 1
+        if num_workers == 1 or len(text) < PARALLEL_MIN_CHARS:
+            return _count_words(text)
+
+        word_counts = Counter()
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            for counts in pool.map(_count_words, _split_corpus(text, num_workers * 4)):
+                word_counts.update(counts)
+        return word_counts
+
+    def _encode_word_uncached(self, word):
+        ids = list(word.encode("utf-8"))
+        merges = self.merges
+
+        # Merge ids grow with training order, so the id doubles as the rank:
+        # always apply the earliest learned merge present in the word
+        while len(ids) >= 2:
+            best_rank = None
+            for pair in zip(ids, ids[1:]):
+                rank = merges.get(pair)
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_pair, best_rank = pair, rank
+            if best_rank is None:
+                break
+            ids = _merge(ids, best_pair, best_rank)
+        return tuple(ids)
+
+    def encode(self, text, return_type="list"):
+        """
+        Encode text to token ids.
+
+        return_type="list" gives plain ints, "array" a compact array('I') and
+        "numpy" a uint32 ndarray sharing that array's buffer (4 bytes per token
+        instead of a 28+ byte int object each).
+        """
+        if return_type not in RETURN_TYPES:
+            raise ValueError(f"return_type must be one of {RETURN_TYPES}")
+        if return_type == "numpy" and np is None:
+            raise ImportError("numpy is required for return_type='numpy'")
+
+        if not self.merges:
+            # Without merges token ids are the UTF-8 bytes themselves
+            data = text.encode("utf-8")
+            if return_type == "list":
+                return list(data)
+            if return_type == "numpy":
+                return np.frombuffer(data, dtype=np.uint8).astype(np.uint32)
+            return array("I", array("B", data))
+
+        ids = [] if return_type == "list" else array("I")
+        encode_word = self._encode_word
+        for word in SPLIT_RE.findall(text):
+            ids.extend(encode_word(word))
+
+        if return_type == "numpy":
+            return np.frombuffer(ids, dtype=np.uint32)
+        return ids
+
+    def encode_batch(self, texts, num_workers=None, use_processes=False, return_type="list"):
+        """
+        Encode many texts concurrently, preserving their order.
+
+        Threads share this tokenizer's word cache but are limited by the GIL;
+        processes give real parallelism for large batches at the cost of
+        pickling the merges to every worker once.
+        """
+        texts = list(texts)
+        num_workers = num_workers or os.cpu_count() or 1
+        if num_workers == 1 or len(texts) < 2:
+            return [self.encode(text, return_type=return_type) for text in texts]
+
+        if use_processes:
+            chunksize = max(1, len(texts) // (num_workers * 4))
+            with ProcessPoolExecutor(
+                max_workers=num_workers,
+                initializer=_init_worker,
+                initargs=(self,),
+            ) as pool:
+                encode = partial(_encode_in_worker, return_type=return_type)
+                return list(pool.map(encode, texts, chunksize=chunksize))
+
+        encode = partial(self.encode, return_type=return_type)
+        with ThreadPoolExecutor(max_workers=num_workers) as pool:
+            return list(pool.map(encode, texts))
 
     def decode(self, encoded_text):
-        decoded_text = []
+        """
+        Decode token ids from a list, array('I'), numpy array or any other
+        buffer of unsigned ints. Token bytes are gathered into one bytes
+        object and decoded once, no per-token strings are created.
+        """
+        return self._decode_bytes(encoded_text).decode("utf-8", errors="replace")
+
+    def decode_stream(self, token_chunks):
+        """
+        Decode token ids that arrive a chunk at a time (e.g. from a streamed
+        response) and yield text as soon as it is valid UTF-8.
+
+        Bytes of a multi-byte char that is split across chunks are held back
+        until the rest arrives, so every chunk costs O(new tokens) instead of
+        re-decoding the whole prefix.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        for chunk in token_chunks:
+            # A single id, including numpy scalars from iterating "numpy" output
+            if isinstance(chunk, numbers.Integral):
+                chunk = [int(chunk)]
+            text = decoder.decode(self._decode_bytes(chunk))
+            if text:
+                yield text
+
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def _decode_bytes(self, encoded_text):
+        if np is not None and not isinstance(encoded_text, list):
+            tokens = np.asarray(encoded_text)
+            if tokens.size == 0:
+                return b""
+            if tokens.max() < 256:
+                # Byte-level ids (e.g. ASCII text): the ids are the bytes
+                return tokens.astype(np.uint8).tobytes()
+            if tokens.size >= VECTORIZED_DECODE_MIN_TOKENS:
+                return self._gather_bytes(tokens)
+            encoded_text = tokens.tolist()
+        elif not isinstance(encoded_text, list):
+            try:
+                encoded_text = memoryview(encoded_text).tolist()
+            except TypeError:  # plain iterable without the buffer protocol
+                encoded_text = list(encoded_text)
+
+        try:
+            # Byte-level ids go straight through bytes() in C
+            return bytes(encoded_text)
+        except ValueError:
+            return b"".join(map(self.vocab.__getitem__, encoded_text))
+
+    def _gather_bytes(self, tokens):
+        """Vectorized decode: index every token's bytes out of one flat blob."""
+        if self._decode_table is None:
+            pieces = [self.vocab[i] for i in range(len(self.vocab))]
+            lengths = np.fromiter(map(len, pieces), dtype=np.int64, count=len(pieces))
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            blob = np.frombuffer(b"".join(pieces), dtype=np.uint8)
+            self._decode_table = (blob, offsets, lengths)
+
+        blob, offsets, lengths = self._decode_table
+        token_lengths = lengths[tokens]
+        # Position of each output byte = token start in blob + index within token
+        out_starts = np.cumsum(token_lengths) - token_lengths
+        positions = np.arange(token_lengths.sum()) + np.repeat(
+            offsets[tokens] - out_starts, token_lengths
+        )
+        return blob[positions].tobytes()
 
-        for word in encoded_text:
-            decoded_text.append(chr(word))
 
-        return "".join(decoded_text)
+if __name__ == "__main__":
+    text = "hi there"
+    tokenizer = Tokenizer()
+    print(tokenizer.encode(text))
+    print(tokenizer.decode([104, 105, 32, 116, 104, 101, 114, 101]))
 
+    tokenizer.train("hi there, hi here, hi where " * 50, vocab_size=270)
+    print(tokenizer.encode(text))
+    print(tokenizer.decode(tokenizer.encode(text)))
 
-text = "hi there"
-tokenizer = Tokenizer()
-print(tokenizer.encode(text))
-print(tokenizer.decode([104, 105, 32, 116, 104, 101, 114, 101]))
+    # Stream one token at a time: "é" and "🚀" span several byte tokens
+    for piece in tokenizer.decode_stream(tokenizer.encode("hi thére 🚀")):
+        print(repr(piece))
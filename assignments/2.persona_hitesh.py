@@ -1,5 +1,11 @@
 from google import genai
 import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from genai_utils.streaming import iter_genai_text, print_stream, timing_report
 
 
 class HiteshSirPersona:
@@ -146,7 +152,9 @@ class HiteshSirPersona:
             if user_input.lower() == "quit":
                 break
 
-            response = self.client.models.generate_content(
+            # Streamed, so the reply starts printing as soon as Gemini produces it
+            start = time.perf_counter()
+            stream = self.client.models.generate_content_stream(
                 model="gemini-2.0-flash-001",
                 config=genai.types.GenerateContentConfig(
                     system_instruction=self.system_prompt
@@ -154,7 +162,8 @@ class HiteshSirPersona:
                 contents=user_input,
             )
 
-            print(response.text)
+            _, timings = print_stream(iter_genai_text(stream), start)
+            print(timing_report(timings))
 
 
 if __name__ == "__main__":
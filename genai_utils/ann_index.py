@@ -0,0 +1,195 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+# Codes per sub-quantizer: 256 so every code fits in one uint8
+PQ_CODES = 256
+KMEANS_ITERATIONS = 10
+# Training points per centroid, more only slows k-means down
+KMEANS_SAMPLES_PER_CENTROID = 32
+
+
+def _kmeans(points, n_clusters, rng, iterations=KMEANS_ITERATIONS):
+    """Plain Lloyd's k-means on (a sample of) points, returns the centroids."""
+    n_clusters = min(n_clusters, len(points))
+    sample_size = min(len(points), n_clusters * KMEANS_SAMPLES_PER_CENTROID)
+    sample = points[rng.choice(len(points), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, n_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = _nearest(sample, centroids)
+        counts = np.bincount(assignment, minlength=n_clusters)
+        filled = counts > 0
+        # Per-cluster sums in one pass over the points sorted by cluster
+        starts = np.cumsum(counts) - counts
+        sums = np.add.reduceat(sample[np.argsort(assignment)], starts[filled])
+        centroids[filled] = sums / counts[filled, None]
+        # Re-seed empty clusters on random points instead of leaving them dead
+        empty = np.flatnonzero(~filled)
+        centroids[empty] = sample[rng.choice(sample_size, len(empty))]
+    return centroids
+
+
+def _nearest(points, centroids):
+    # argmin ||p - c||^2 == argmin ||c||^2 - 2 p.c
+    distances = (centroids * centroids).sum(axis=1) - 2 * points @ centroids.T
+    return distances.argmin(axis=1)
+
+
+def default_subspaces(dim):
+    """Smallest number of sub-quantizers with at most 8 dims each that divides dim."""
+    return next(m for m in range(max(1, dim // 8), dim + 1) if dim % m == 0)
+
+
+class IVFPQIndex:
+    """
+    Inverted file index with product-quantized residuals, for inner-product
+    search over unit vectors (cosine similarity).
+
+    Vectors are bucketed under their nearest of `n_lists` coarse centroids and
+    only stored as `m` one-byte codes of their residual, so a search touches
+    `nprobe` buckets and m bytes per candidate instead of the full matrix.
+    Scores are approximate; LocalVectorStore re-ranks the best candidates
+    with the exact vectors.
+    """
+
+    def __init__(self, centroids, codebooks, nprobe=8):
+        self.centroids = centroids  # (n_lists, dim)
+        self.codebooks = codebooks  # (m, PQ_CODES, dim // m)
+        self.nprobe = nprobe
+        self.codes = np.zeros((0, len(codebooks)), dtype=np.uint8)
+        self.lists = np.zeros(0, dtype=np.int32)  # coarse list of every row
+        self._order = None  # rows sorted by list, rebuilt after inserts
+        self._offsets = None
+
+    def __len__(self):
+        return len(self.lists)
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @classmethod
+    def train(cls, vectors, n_lists=None, m=None, nprobe=8, seed=0):
+        """Learn coarse centroids and PQ codebooks from (a sample of) vectors."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n, dim = vectors.shape
+        n_lists = n_lists or max(1, int(np.sqrt(n)))
+        m = m or default_subspaces(dim)
+        if dim % m:
+            raise ValueError(f"m={m} sub-quantizers must divide dim={dim}")
+
+        rng = np.random.default_rng(seed)
+        centroids = _kmeans(vectors, n_lists, rng)
+        residuals = vectors - centroids[_nearest(vectors, centroids)]
+
+        sub_dim = dim // m
+        codebooks = np.zeros((m, PQ_CODES, sub_dim), dtype=np.float32)
+        for j in range(m):
+            sub = np.ascontiguousarray(residuals[:, j * sub_dim : (j + 1) * sub_dim])
+            book = _kmeans(sub, PQ_CODES, rng)
+            codebooks[j, : len(book)] = book
+            # Fewer points than codes: unused codes just repeat the first one
+            codebooks[j, len(book) :] = book[0]
+        return cls(centroids, codebooks, nprobe=nprobe)
+
+    def _encode(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        lists = _nearest(vectors, self.centroids).astype(np.int32)
+        residuals = vectors - self.centroids[lists]
+
+        m, _, sub_dim = self.codebooks.shape
+        codes = np.empty((len(vectors), m), dtype=np.uint8)
+        for j in range(m):
+            sub = residuals[:, j * sub_dim : (j + 1) * sub_dim]
+            codes[:, j] = _nearest(sub, self.codebooks[j])
+        return lists, codes
+
+    # ----- Updates (row numbers follow the vector store's rows) -----
+
+    def add(self, vectors):
+        """Append rows; the index never needs retraining to take new vectors."""
+        lists, codes = self._encode(vectors)
+        self.lists = np.concatenate([self.lists, lists])
+        self.codes = np.concatenate([self.codes, codes])
+        self._order = None
+
+    def update(self, rows, vectors):
+        lists, codes = self._encode(vectors)
+        if not self.lists.flags.writeable:
+            self.lists, self.codes = np.array(self.lists), np.array(self.codes)
+        self.lists[rows] = lists
+        self.codes[rows] = codes
+        self._order = None
+
+    def keep(self, rows):
+        """Drop every row not in `rows` (after a delete in the vector store)."""
+        self.lists = self.lists[rows]
+        self.codes = self.codes[rows]
+        self._order = None
+
+    # ----- Searching -----
+
+    def _inverted_lists(self):
+        if self._order is None:
+            self._order = np.argsort(self.lists, kind="stable")
+            self._offsets = np.searchsorted(
+                self.lists[self._order], np.arange(self.n_lists + 1)
+            )
+        return self._order, self._offsets
+
+    def search(self, query, k, nprobe=None):
+        """Rows of the (approximately) k best vectors for a unit query vector."""
+        if not len(self) or k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        query = np.asarray(query, dtype=np.float32)
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+
+        coarse = self.centroids @ query
+        probed = np.argpartition(coarse, -nprobe)[-nprobe:]
+        order, offsets = self._inverted_lists()
+        rows = np.concatenate([order[offsets[l] : offsets[l + 1]] for l in probed])
+        if not len(rows):
+            return rows
+
+        # <q, c + r> = <q, c> + sum over sub-spaces of <q_j, codebook_j[code_j]>
+        m, _, sub_dim = self.codebooks.shape
+        table = np.einsum("jcd,jd->jc", self.codebooks, query.reshape(m, sub_dim))
+        scores = coarse[self.lists[rows]] + table[np.arange(m), self.codes[rows]].sum(
+            axis=1
+        )
+
+        k = min(k, len(rows))
+        top = np.argpartition(scores, -k)[-k:]
+        return rows[top[np.argsort(scores[top])[::-1]]]
+
+    # ----- Persistence -----
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ("centroids", "codebooks", "codes", "lists"):
+            with open(path / f"{name}.tmp", "wb") as f:
+                np.save(f, getattr(self, name))
+        # mmapped files can't be replaced on Windows: load them into memory first
+        for name in ("codes", "lists"):
+            if isinstance(getattr(self, name), np.memmap):
+                setattr(self, name, np.array(getattr(self, name)))
+        for name in ("centroids", "codebooks", "codes", "lists"):
+            (path / f"{name}.tmp").replace(path / f"{name}.npy")
+        (path / "params.json").write_text(json.dumps({"nprobe": self.nprobe}))
+
+    @classmethod
+    def load(cls, path):
+        """mmap the arrays: opening is free and only probed lists get paged in."""
+        path = Path(path)
+        params = json.loads((path / "params.json").read_text())
+        index = cls(
+            np.load(path / "centroids.npy"),
+            np.load(path / "codebooks.npy"),
+            nprobe=params["nprobe"],
+        )
+        index.codes = np.load(path / "codes.npy", mmap_mode="r")
+        index.lists = np.load(path / "lists.npy", mmap_mode="r")
+        return index
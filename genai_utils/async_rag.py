@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client import AsyncQdrantClient
+
+from genai_utils.incremental_ingest import QDRANT_URL
+from genai_utils.local_vector_store import VECTOR_BACKEND, LocalVectorStore
+
+
+async def iter_list_strings(text_chunks):
+    """
+    Yield the string items of a JSON list (bare, or nested in an object like
+    {"output": [...]}) as soon as each one is complete in a stream of text
+    chunks, instead of waiting for the whole document to parse it.
+    """
+    containers = []  # "[" / "{" nesting at the current position
+    literal = None  # chars of the string being read, None outside strings
+    escaped = False
+
+    async for chunk in text_chunks:
+        for char in chunk:
+            if literal is not None:
+                literal.append(char)
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    if containers and containers[-1] == "[":
+                        yield json.loads("".join(literal))
+                    literal = None
+            elif char == '"':
+                literal = [char]
+            elif char in "[{":
+                containers.append(char)
+            elif char in "]}" and containers:
+                containers.pop()
+
+
+async def iter_stream_text(stream):
+    """Text deltas of an AsyncOpenAI chat completion stream."""
+    async for event in stream:
+        if event.choices and event.choices[0].delta.content:
+            yield event.choices[0].delta.content
+
+
+class AsyncRetriever:
+    """
+    similarity_search() as a coroutine: query embedding via aembed_query and
+    the search itself on AsyncQdrantClient (or the local store in a thread),
+    so many searches can be in flight on one event loop.
+    """
+
+    def __init__(self, embedding, collection_name, url=QDRANT_URL, backend=None):
+        self.embedding = embedding
+        self.collection_name = collection_name
+        if (backend or VECTOR_BACKEND) == "local":
+            self.client = None
+            self.store = LocalVectorStore.from_existing_collection(
+                embedding, collection_name
+            )
+        else:
+            self.client = AsyncQdrantClient(url=url)
+            self.store = None
+
+    async def search(self, query, k=4):
+        return [doc for doc, _ in await self.search_with_score(query, k)]
+
+    async def search_with_score(self, query, k=4):
+        vector = await self.embedding.aembed_query(query)
+        if self.client is None:
+            return await asyncio.to_thread(
+                self.store.similarity_search_with_score_by_vector, vector, k
+            )
+
+        response = await self.client.query_points(
+            collection_name=self.collection_name,
+            query=vector,
+            limit=k,
+            with_payload=True,
+        )
+        return [
+            (
+                QdrantVectorStore._document_from_point(
+                    point,
+                    self.collection_name,
+                    QdrantVectorStore.CONTENT_KEY,
+                    QdrantVectorStore.METADATA_KEY,
+                ),
+                point.score,
+            )
+            for point in response.points
+        ]
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
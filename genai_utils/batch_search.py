@@ -0,0 +1,52 @@
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client.models import QueryRequest
+
+from genai_utils.embedding_cache import embed_queries
+from genai_utils.local_vector_store import LocalVectorStore
+
+
+def _qdrant_search_batch(vector_store, vectors, k):
+    requests = [
+        QueryRequest(
+            query=vector,
+            using=vector_store.vector_name or None,
+            limit=k,
+            with_payload=True,
+        )
+        for vector in vectors
+    ]
+    responses = vector_store.client.query_batch_points(
+        collection_name=vector_store.collection_name, requests=requests
+    )
+    return [
+        [
+            vector_store._document_from_point(
+                point,
+                vector_store.collection_name,
+                vector_store.content_payload_key,
+                vector_store.metadata_payload_key,
+            )
+            for point in response.points
+        ]
+        for response in responses
+    ]
+
+
+def batch_similarity_search(vector_store, queries, k=4):
+    """
+    similarity_search() for several queries at once: one embeddings request
+    for all of them, then one batch search (Qdrant query_batch_points, or a
+    single matrix product for LocalVectorStore).
+
+    Returns one list of Documents per query, in query order.
+    """
+    queries = list(queries)
+    if not queries:
+        return []
+
+    vectors = embed_queries(vector_store.embeddings, queries)
+    if isinstance(vector_store, LocalVectorStore):
+        return vector_store.similarity_search_by_vectors(vectors, k)
+    if isinstance(vector_store, QdrantVectorStore):
+        return _qdrant_search_batch(vector_store, vectors, k)
+    return [vector_store.similarity_search_by_vector(vector, k) for vector in vectors]
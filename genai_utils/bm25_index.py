@@ -0,0 +1,214 @@
+import json
+import math
+import mmap
+import re
+import struct
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from genai_utils.rrf import HitIds, reciprocal_rank_fusion
+
+MAGIC = b"BM25"
+VERSION = 1
+
+# File layout: PREAMBLE | JSON header (term dictionary) | norms | postings
+PREAMBLE = struct.Struct("<4sII")
+
+# Identifiers keep their dots (fs.readFile), numbers stand alone
+TOKEN_RE = re.compile(r"[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*|\d+")
+
+K1 = 1.2
+B = 0.75
+POSTINGS_CACHE_SIZE = 4096
+
+
+def tokenize(text):
+    """Lowercased terms; dotted identifiers also yield their parts (fs, readfile)."""
+    for match in TOKEN_RE.finditer(text):
+        token = match.group().lower()
+        yield token
+        if "." in token:
+            yield from token.split(".")
+
+
+def _encode_varint(value, out):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_varints(data):
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+
+def _align(offset, to=8):
+    return (offset + to - 1) // to * to
+
+
+class BM25Index:
+    """
+    Okapi BM25 over chunk indexes (the same ids as ChunkStore/ChunkArtifact).
+
+    Posting lists are (doc gap, term frequency) varints, the per-chunk length
+    normalization k1 * (1 - b + b * len / avg_len) is precomputed, and saved
+    indexes are mmapped, so a lookup is a few dict hits and numpy adds.
+    """
+
+    def __init__(self, terms, norms, postings, k1=K1, b=B):
+        self.terms = terms  # term -> (offset, length, document frequency)
+        self.norms = norms  # float32 per chunk
+        self.postings = postings  # bytes-like holding every posting list
+        self.k1 = k1
+        self.b = b
+        self._mm = None
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.norms)
+
+    @classmethod
+    def build(cls, texts, k1=K1, b=B):
+        """Index an iterable of chunk texts; chunk i gets id i."""
+        term_docs = {}  # term -> [(chunk id, tf), ...] in chunk order
+        lengths = []
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                term_docs.setdefault(term, []).append((doc_id, tf))
+
+        lengths = np.array(lengths, dtype=np.float32)
+        avg_length = float(lengths.mean()) if len(lengths) else 0.0
+        norms = k1 * (1 - b + b * lengths / (avg_length or 1.0))
+
+        terms = {}
+        postings = bytearray()
+        for term, docs in term_docs.items():
+            offset = len(postings)
+            previous = 0
+            for doc_id, tf in docs:
+                _encode_varint(doc_id - previous, postings)
+                _encode_varint(tf, postings)
+                previous = doc_id
+            terms[term] = (offset, len(postings) - offset, len(docs))
+        return cls(terms, norms.astype(np.float32), bytes(postings), k1=k1, b=b)
+
+    def _postings(self, term):
+        cached = self._cache.get(term)
+        if cached is None:
+            offset, length, _ = self.terms[term]
+            pairs = np.array(
+                _decode_varints(self.postings[offset : offset + length]),
+                dtype=np.int64,
+            ).reshape(-1, 2)
+            cached = (np.cumsum(pairs[:, 0]), pairs[:, 1].astype(np.float32))
+            if len(self._cache) >= POSTINGS_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[term] = cached
+        return cached
+
+    def search(self, query, k=10):
+        """(chunk ids, scores) of the k best matches, best first."""
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term not in self.terms:
+                continue
+            df = self.terms[term][2]
+            idf = math.log(1 + (len(self) - df + 0.5) / (df + 0.5))
+            docs, tfs = self._postings(term)
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + self.norms[docs])
+
+        matched = np.flatnonzero(scores)
+        k = max(min(k, len(matched)), 0)
+        if not k:
+            return matched[:0], scores[matched[:0]]
+        top = matched[np.argpartition(scores[matched], -k)[-k:]]
+        top = top[np.argsort(scores[top])[::-1]]
+        return top, scores[top]
+
+    # ----- Persistence -----
+
+    def save(self, path):
+        header = json.dumps(
+            {"count": len(self), "k1": self.k1, "b": self.b, "terms": self.terms}
+        ).encode("utf-8")
+        data_start = _align(PREAMBLE.size + len(header))
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            f.seek(data_start)
+            f.write(np.asarray(self.norms, dtype=np.float32).tobytes())
+            f.write(self.postings)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_len = PREAMBLE.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION:
+            mm.close()
+            raise ValueError(f"{path} is not a BM25 index (v{VERSION})")
+        header = json.loads(mm[PREAMBLE.size : PREAMBLE.size + header_len])
+        data_start = _align(PREAMBLE.size + header_len)
+        count = header["count"]
+
+        norms = np.frombuffer(mm, dtype=np.float32, count=count, offset=data_start)
+        postings = memoryview(mm)[data_start + 4 * count :]
+        index = cls(
+            {term: tuple(entry) for term, entry in header["terms"].items()},
+            norms,
+            postings,
+            k1=header["k1"],
+            b=header["b"],
+        )
+        index._mm = mm
+        return index
+
+    def close(self):
+        if self._mm is None:
+            return
+        self._cache.clear()
+        self.postings.release()
+        self.norms = self.postings = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # a search result still references the norms
+        self._mm = None
+
+
+def hybrid_search(vector_store, chunks, query, k=4, fetch_k=20, weights=(1.0, 1.0)):
+    """
+    Dense similarity_search fused (RRF) with BM25 over the chunk artifact, so
+    exact identifiers like `fs.readFile` rank even when embeddings blur them.
+
+    `chunks` is a ChunkArtifact whose point ids match the vector store;
+    weights are (dense, sparse). Returns the top k chunk Documents.
+    """
+    # Dense hits the artifact doesn't know (stale or foreign collection) are
+    # still fused, under ids of their own
+    hit_ids = HitIds(chunks)
+    dense = [
+        hit_ids.id_of(doc) for doc in vector_store.similarity_search(query, k=fetch_k)
+    ]
+    sparse, _ = chunks.bm25.search(query, k=fetch_k)
+    chunk_ids, _ = reciprocal_rank_fusion([dense, sparse], top_k=k, weights=weights)
+    return [hit_ids.document(chunk_id) for chunk_id in chunk_ids]
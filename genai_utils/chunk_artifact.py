@@ -0,0 +1,140 @@
+import os
+import threading
+from pathlib import Path
+
+from genai_utils.bm25_index import BM25Index
+from genai_utils.chunk_store import ChunkStore
+from genai_utils.pdf_pipeline import iter_pdf_pages
+
+ARTIFACT_DIR = Path(__file__).parent.parent / ".cache" / "chunks"
+
+
+def artifact_path_for(pdf_path):
+    return ARTIFACT_DIR / f"{Path(pdf_path).stem}.chunks"
+
+
+def bm25_path_for(path):
+    return Path(path).with_suffix(".bm25")
+
+
+def build_bm25_index(store, path):
+    index = BM25Index.build(store.text(i) for i in range(len(store)))
+    index.save(bm25_path_for(path))
+    return index
+
+
+def build_chunk_artifact(pdf_path, path=None, workers=None):
+    """
+    Parse and chunk the PDF once (same chunks as the Qdrant ingestion) and
+    save them as a ChunkStore plus a BM25 index over them, so query paths
+    never have to run PyPDF again.
+    """
+    path = path or artifact_path_for(pdf_path)
+    stat = os.stat(pdf_path)
+
+    store = ChunkStore()
+    store.add_chunked_pages(
+        iter_pdf_pages(pdf_path, workers=workers),
+        source=Path(pdf_path).name,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+    )
+    store.save(path)
+    build_bm25_index(store, path)
+    return path
+
+
+def is_stale(path, pdf_path):
+    """True if the artifact is missing or was built from another version of the PDF."""
+    if not Path(path).exists():
+        return True
+    try:
+        doc = ChunkStore.read_header(path)["docs"][0]
+    except (ValueError, IndexError):
+        return True
+    stat = os.stat(pdf_path)
+    return (doc.get("size"), doc.get("mtime_ns")) != (stat.st_size, stat.st_mtime_ns)
+
+
+class ChunkArtifact:
+    """
+    Read-only, lazily mmapped ChunkStore of one PDF.
+
+    Creating one costs nothing: the file is only mapped (and rebuilt first if
+    pdf_path is given and the artifact is stale) on the first access, and then
+    chunk text is sliced straight out of the page cache.
+    """
+
+    def __init__(self, path, pdf_path=None):
+        self.path = Path(path)
+        self.pdf_path = pdf_path
+        self._store = None
+        self._bm25 = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_pdf(cls, pdf_path):
+        return cls(artifact_path_for(pdf_path), pdf_path=pdf_path)
+
+    @property
+    def store(self):
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    if self.pdf_path is not None and is_stale(self.path, self.pdf_path):
+                        build_chunk_artifact(self.pdf_path, self.path)
+                    self._store = ChunkStore.load(self.path)
+        return self._store
+
+    @property
+    def bm25(self):
+        """BM25 index over the chunks (built on first use for older artifacts)."""
+        if self._bm25 is None:
+            store = self.store
+            with self._lock:
+                if self._bm25 is None:
+                    bm25_path = bm25_path_for(self.path)
+                    if (
+                        not bm25_path.exists()
+                        or bm25_path.stat().st_mtime_ns < self.path.stat().st_mtime_ns
+                    ):
+                        build_bm25_index(store, self.path)
+                    self._bm25 = BM25Index.load(bm25_path)
+        return self._bm25
+
+    def __len__(self):
+        return len(self.store)
+
+    def view(self, index):
+        """Chunk text as a memoryview into the mapped file (no copy, no decode)."""
+        return self.store.view(index)
+
+    def text(self, index):
+        return self.store.text(index)
+
+    def page(self, index):
+        return self.store.pages[index]
+
+    def point_id(self, index):
+        return self.store.point_id(index)
+
+    def index_of(self, point_id):
+        """Artifact index of a Qdrant point id (the `_id` metadata of search results)."""
+        return self.store.index_of(point_id)
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.store.document(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def close(self):
+        if self._bm25 is not None:
+            self._bm25.close()
+            self._bm25 = None
+        if self._store is not None:
+            self._store.close()
+            self._store = None
@@ -0,0 +1,258 @@
+import json
+import mmap
+import struct
+import uuid
+from array import array
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+from genai_utils.incremental_ingest import chunk_id_for
+from genai_utils.streaming_chunker import PAGE_SEPARATOR, stream_chunks
+
+MAGIC = b"CHST"
+VERSION = 1
+
+# File layout: PREAMBLE | JSON header | chunk table columns | document buffers
+# PREAMBLE: magic, version, JSON header length
+PREAMBLE = struct.Struct("<4sII")
+
+# Column name -> array typecode (point ids are 16 raw bytes per chunk)
+COLUMNS = {
+    "doc_ids": "I",
+    "pages": "I",
+    "page_offsets": "I",
+    "starts": "Q",
+    "ends": "Q",
+    "point_ids": "B",
+}
+
+# Pages kept around to place chunks that start before the current page
+RECENT_PAGES = 8
+
+
+def _align(offset, to=8):
+    return (offset + to - 1) // to * to
+
+
+class ChunkStore:
+    """
+    Compact chunk storage: one contiguous UTF-8 buffer per document plus a
+    column table of (doc_id, page, start, end) byte offsets into it.
+
+    Overlapping chunks share their text instead of each holding a copy, and
+    a chunk's text is only materialized when asked for, as a memoryview
+    slice of its document buffer (zero-copy when loaded from disk via mmap).
+    """
+
+    __slots__ = (
+        "docs",
+        "buffers",
+        "doc_ids",
+        "pages",
+        "page_offsets",
+        "starts",
+        "ends",
+        "point_ids",
+        "_mm",
+        "_index",
+    )
+
+    def __init__(self):
+        self.docs = []  # per document: source and any extra metadata
+        self.buffers = []  # per document: its whole text, UTF-8 encoded
+        self.doc_ids = array("I")
+        self.pages = array("I")
+        self.page_offsets = array("I")  # start_index (chars) inside the page
+        self.starts = array("Q")  # byte range inside the document buffer
+        self.ends = array("Q")
+        self.point_ids = bytearray()  # 16-byte Qdrant point id per chunk
+        self._mm = None
+        self._index = None
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    # ----- Building -----
+
+    def add_pages(self, pages, chunker=stream_chunks, **metadata):
+        """
+        Add one document from an iterator of page Documents, chunked with
+        `chunker` (anything yielding chunks with page/start_index metadata).
+        Pages are consumed lazily, so only the buffer is ever fully in memory.
+        """
+        doc_id, buffer, recent = self._start_document(metadata)
+
+        def recording(pages):
+            for page in pages:
+                self._append_page(buffer, recent, page)
+                yield page
+
+        for chunk in chunker(recording(pages)):
+            self._append_chunk(doc_id, buffer, recent, chunk)
+        return doc_id
+
+    def add_chunked_pages(self, chunked_pages, **metadata):
+        """
+        Add one document from (page Document, chunks of that page) pairs,
+        e.g. the output of pdf_pipeline.iter_pdf_pages.
+        """
+        doc_id, buffer, recent = self._start_document(metadata)
+        for page, chunks in chunked_pages:
+            self._append_page(buffer, recent, page)
+            for chunk in chunks:
+                self._append_chunk(doc_id, buffer, recent, chunk)
+        return doc_id
+
+    def _start_document(self, metadata):
+        if self._mm is not None:
+            raise ValueError("a ChunkStore loaded from disk is read-only")
+        self.docs.append(dict(metadata))
+        self.buffers.append(bytearray())
+        self._index = None
+        return len(self.docs) - 1, self.buffers[-1], {}
+
+    def _append_page(self, buffer, recent, page):
+        if len(recent):
+            buffer += PAGE_SEPARATOR.encode("utf-8")
+        if "source" not in self.docs[-1]:
+            self.docs[-1]["source"] = page.metadata.get("source", "")
+
+        recent[page.metadata.get("page", 0)] = (len(buffer), page.page_content)
+        buffer += page.page_content.encode("utf-8")
+        while len(recent) > RECENT_PAGES:
+            del recent[next(iter(recent))]
+
+    def _append_chunk(self, doc_id, buffer, recent, chunk):
+        page = chunk.metadata.get("page", 0)
+        page_offset = chunk.metadata.get("start_index", 0)
+        page_start, page_text = recent[page]
+
+        if page_text.isascii():
+            start = page_start + page_offset
+        else:
+            start = page_start + len(page_text[:page_offset].encode("utf-8"))
+        end = start + len(chunk.page_content.encode("utf-8"))
+
+        self.doc_ids.append(doc_id)
+        self.pages.append(page)
+        self.page_offsets.append(page_offset)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.point_ids += uuid.UUID(chunk_id_for(chunk)).bytes
+
+    # ----- Reading -----
+
+    def view(self, index):
+        """Chunk text as a memoryview slice of its document buffer (no copy)."""
+        buffer = self.buffers[self.doc_ids[index]]
+        return memoryview(buffer)[self.starts[index] : self.ends[index]]
+
+    def text(self, index):
+        return str(self.view(index), "utf-8")
+
+    def point_id(self, index):
+        return str(uuid.UUID(bytes=bytes(self.point_ids[index * 16 : index * 16 + 16])))
+
+    def index_of(self, point_id):
+        """Chunk index of a Qdrant point id (the `_id` metadata of search results)."""
+        if self._index is None:
+            self._index = {self.point_id(i): i for i in range(len(self))}
+        return self._index[point_id]
+
+    def document(self, index):
+        doc = self.docs[self.doc_ids[index]]
+        return Document(
+            page_content=self.text(index),
+            metadata={
+                "source": doc.get("source", ""),
+                "page": self.pages[index],
+                "start_index": self.page_offsets[index],
+                "_id": self.point_id(index),
+            },
+        )
+
+    # ----- Persistence -----
+
+    def save(self, path):
+        columns = {name: getattr(self, name) for name in COLUMNS}
+
+        # Lay out the columns and buffers after the header, 8-byte aligned
+        layout = {}
+        offset = 0
+        for name, column in columns.items():
+            size = len(column) * (column.itemsize if name != "point_ids" else 1)
+            layout[name] = [offset, size]
+            offset = _align(offset + size)
+        docs = []
+        for doc, buffer in zip(self.docs, self.buffers):
+            docs.append({**doc, "offset": offset, "length": len(buffer)})
+            offset += len(buffer)
+
+        header = json.dumps({"count": len(self), "columns": layout, "docs": docs})
+        header = header.encode("utf-8")
+        data_start = _align(PREAMBLE.size + len(header))
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            for name, column in columns.items():
+                f.seek(data_start + layout[name][0])
+                f.write(column)
+            for doc, buffer in zip(docs, self.buffers):
+                f.seek(data_start + doc["offset"])
+                f.write(buffer)
+        tmp_path.replace(path)
+
+    @staticmethod
+    def read_header(path):
+        with open(path, "rb") as f:
+            magic, version, header_len = PREAMBLE.unpack(f.read(PREAMBLE.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a chunk store (v{VERSION})")
+            return json.loads(f.read(header_len))
+
+    @classmethod
+    def load(cls, path):
+        """Map a saved store read-only; columns and text are views into the mmap."""
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_len = PREAMBLE.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION:
+            mm.close()
+            raise ValueError(f"{path} is not a chunk store (v{VERSION})")
+        header = json.loads(mm[PREAMBLE.size : PREAMBLE.size + header_len])
+        data_start = _align(PREAMBLE.size + header_len)
+        data = memoryview(mm)[data_start:]
+
+        store = cls()
+        store._mm = mm
+        for name, (offset, size) in header["columns"].items():
+            setattr(store, name, data[offset : offset + size].cast(COLUMNS[name]))
+        store.docs = [
+            {k: v for k, v in doc.items() if k not in ("offset", "length")}
+            for doc in header["docs"]
+        ]
+        store.buffers = [
+            data[doc["offset"] : doc["offset"] + doc["length"]]
+            for doc in header["docs"]
+        ]
+        return store
+
+    def close(self):
+        if self._mm is None:
+            return
+        for name in COLUMNS:
+            getattr(self, name).release()
+        for buffer in self.buffers:
+            buffer.release()
+        self.buffers = []
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # a caller still holds a view(); the map goes away with it
+        self._mm = None
@@ -0,0 +1,92 @@
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from genai_utils.context_packer import get_encoding
+
+# Cosine similarity a sentence needs to the query to be kept
+DEFAULT_CUTOFF = 0.7
+# Sentences kept on each side of a relevant one, for context
+DEFAULT_NEIGHBOURS = 1
+# Marks where sentences were dropped inside a text
+GAP = " … "
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[`])|\n\s*\n")
+
+# texts: compressed texts (one per input, empty if nothing was kept);
+# tokens / input_tokens: their size after and before compression
+CompressedContext = namedtuple(
+    "CompressedContext", "texts tokens input_tokens sentences kept"
+)
+
+
+def split_sentences(text):
+    return [
+        sentence.strip() for sentence in SENTENCE_RE.split(text) if sentence.strip()
+    ]
+
+
+def compress_context(
+    query,
+    texts,
+    embedding,
+    cutoff=DEFAULT_CUTOFF,
+    neighbours=DEFAULT_NEIGHBOURS,
+    encoding=None,
+):
+    """
+    Extractive compression: split the retrieved texts into sentences, embed
+    them all in one embed_documents() batch (cached, so repeats are free),
+    and keep the sentences whose similarity to the query reaches `cutoff`,
+    plus `neighbours` sentences around each. The single best sentence is
+    always kept, so the model never gets an empty context.
+    """
+    sentences = [split_sentences(text) for text in texts]
+    flat = [sentence for text_sentences in sentences for sentence in text_sentences]
+    encoding = encoding or get_encoding()
+    input_tokens = sum(len(ids) for ids in encoding.encode_ordinary_batch(texts))
+    if not flat:
+        return CompressedContext(list(texts), input_tokens, input_tokens, 0, 0)
+
+    vectors = np.asarray(embedding.embed_documents(flat), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    query_vector = np.asarray(embedding.embed_query(query), dtype=np.float32)
+    relevance = vectors @ (query_vector / np.linalg.norm(query_vector))
+
+    relevant = relevance >= min(cutoff, relevance.max())
+    # Which text each sentence belongs to; neighbours never cross texts
+    owner = np.repeat(np.arange(len(texts)), [len(s) for s in sentences])
+    keep = relevant.copy()
+    for shift in range(1, neighbours + 1):
+        same = owner[shift:] == owner[:-shift]
+        keep[shift:] |= relevant[:-shift] & same
+        keep[:-shift] |= relevant[shift:] & same
+
+    compressed = []
+    position = 0
+    for text_sentences in sentences:
+        parts = []
+        for offset, sentence in enumerate(text_sentences):
+            index = position + offset
+            if keep[index]:
+                if parts and not keep[index - 1]:
+                    parts.append(GAP)
+                elif parts:
+                    parts.append(" ")
+                parts.append(sentence)
+        position += len(text_sentences)
+        compressed.append("".join(parts))
+
+    tokens = sum(len(ids) for ids in encoding.encode_ordinary_batch(compressed))
+    return CompressedContext(
+        compressed, tokens, input_tokens, len(flat), int(keep.sum())
+    )
+
+
+def compression_report(context):
+    ratio = context.input_tokens / context.tokens if context.tokens else 0.0
+    return (
+        f"✂️ Compression: {context.input_tokens} → {context.tokens} tokens "
+        f"({ratio:.1f}x), {context.kept}/{context.sentences} sentences kept"
+    )
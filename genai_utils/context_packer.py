@@ -0,0 +1,117 @@
+from collections import namedtuple
+from functools import lru_cache
+
+from langchain_core.documents import Document
+
+DEFAULT_ENCODING = "cl100k_base"
+DEFAULT_MAX_TOKENS = 1500
+
+# spans: merged Documents, best first; their metadata["_ids"] lists the chunk
+# ids they cover. tokens: size of the packed context; input_tokens: size of
+# the retrieved chunks joined as they were.
+PackedContext = namedtuple("PackedContext", "spans tokens input_tokens dropped")
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name=DEFAULT_ENCODING):
+    import tiktoken
+
+    return tiktoken.get_encoding(name)
+
+
+def merge_spans(docs, scores=None):
+    """
+    Merge retrieved chunks that overlap or touch on the same page back into
+    one span, using their start_index offsets, so the chunk_overlap text is
+    only sent once. Chunks without a start_index (collections indexed without
+    add_start_index=True) can't be placed, so they stay spans of their own,
+    only deduplicated by text. A span scores as its best chunk; by default
+    earlier chunks score higher.
+    """
+    if scores is None:
+        scores = [-position for position in range(len(docs))]
+
+    by_page = {}
+    unplaced = {}  # text -> span of a chunk without start_index
+    for doc, score in zip(docs, scores):
+        if doc.metadata.get("start_index") is None:
+            span = unplaced.setdefault(
+                doc.page_content,
+                [score, doc.metadata.get("source"), doc.metadata.get("page"), None],
+            )
+            span[0] = max(span[0], score)
+            span.append(doc.metadata.get("_id"))
+            continue
+        key = (doc.metadata.get("source"), doc.metadata.get("page"))
+        by_page.setdefault(key, []).append((doc, score))
+
+    spans = []
+    for (source, page), members in by_page.items():
+        members.sort(key=lambda member: member[0].metadata["start_index"])
+        text, start, ids, best = None, 0, [], None
+        for doc, score in members:
+            doc_start = doc.metadata["start_index"]
+            if text is not None and doc_start <= start + len(text):
+                # Overlaps (or touches) the current span: append only the new tail
+                text += doc.page_content[start + len(text) - doc_start :]
+                best = max(best, score)
+            else:
+                if text is not None:
+                    spans.append((best, source, page, start, text, ids))
+                text, start, ids, best = doc.page_content, doc_start, [], score
+            if "_id" in doc.metadata and doc.metadata["_id"] not in ids:
+                ids.append(doc.metadata["_id"])
+        spans.append((best, source, page, start, text, ids))
+
+    for text, (best, source, page, start, *ids) in unplaced.items():
+        ids = list(dict.fromkeys(i for i in ids if i is not None))
+        spans.append((best, source, page, start, text, ids))
+
+    return [
+        (
+            Document(
+                page_content=text,
+                metadata={
+                    "source": source,
+                    "page": page,
+                    "start_index": start,
+                    "_ids": ids,
+                },
+            ),
+            score,
+        )
+        for score, source, page, start, text, ids in spans
+    ]
+
+
+def pack_context(docs, max_tokens=DEFAULT_MAX_TOKENS, scores=None, encoding=None):
+    """
+    Merge overlapping chunks into spans, then greedily pack the highest
+    scoring spans that still fit into `max_tokens` (counted with tiktoken).
+    """
+    encoding = encoding or get_encoding()
+    spans = merge_spans(docs, scores)
+    spans.sort(key=lambda span: span[1], reverse=True)
+
+    counts = encoding.encode_ordinary_batch([span.page_content for span, _ in spans])
+    input_tokens = sum(
+        len(ids)
+        for ids in encoding.encode_ordinary_batch([doc.page_content for doc in docs])
+    )
+
+    packed, tokens, dropped = [], 0, 0
+    for (span, _), count in zip(spans, counts):
+        if tokens + len(count) > max_tokens:
+            dropped += 1
+            continue
+        packed.append(span)
+        tokens += len(count)
+    return PackedContext(packed, tokens, input_tokens, dropped)
+
+
+def context_report(context):
+    saved = context.input_tokens - context.tokens
+    return (
+        f"🧮 Context: {context.tokens} tokens in {len(context.spans)} spans "
+        f"({saved} saved of {context.input_tokens}, {context.dropped} spans over budget)"
+    )
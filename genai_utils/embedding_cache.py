@@ -0,0 +1,197 @@
+import hashlib
+import inspect
+import sqlite3
+import threading
+from array import array
+from concurrent.futures import Future
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / ".cache" / "embeddings.sqlite"
+
+# Max inputs per embeddings request: OpenAI allows 2048, Gemini 100
+OPENAI_BATCH_SIZE = 2048
+GEMINI_BATCH_SIZE = 100
+
+# SQLite caps the number of "?" placeholders per statement
+SQLITE_MAX_VARIABLES = 900
+
+# Embedders whose embed_query(q) is just embed_documents([q])[0]
+SYMMETRIC_EMBEDDERS = {"OpenAIEmbeddings", "AzureOpenAIEmbeddings"}
+
+
+def embed_queries(embedder, texts):
+    """
+    Embed several queries in one request where the provider allows it,
+    falling back to one embed_query() call per text.
+    """
+    texts = list(texts)
+    if hasattr(embedder, "embed_queries"):
+        return embedder.embed_queries(texts)
+    if type(embedder).__name__ in SYMMETRIC_EMBEDDERS:
+        return embedder.embed_documents(texts)
+    if "task_type" in inspect.signature(embedder.embed_documents).parameters:
+        # Gemini: a query embedding is a document embedding with the query task type
+        return embedder.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+    return [embedder.embed_query(text) for text in texts]
+
+
+class EmbeddingCache:
+    """
+    Disk-backed store of float32 vectors keyed by a content hash.
+    Safe to share across threads.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+
+    def get_many(self, keys):
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), SQLITE_MAX_VARIABLES):
+                batch = keys[start : start + SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                )
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+        return found
+
+    def put_many(self, items):
+        rows = [(key, array("f", vector).tobytes()) for key, vector in items]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows
+            )
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any LangChain embedder (GoogleGenerativeAIEmbeddings, OpenAIEmbeddings, ...)
+    so that:
+    - texts already embedded by this model are served from the disk cache,
+    - the rest are sent in provider-sized batches,
+    - concurrent requests for the same text share a single API call.
+
+    Drop-in for the `embedding=` argument of QdrantVectorStore.
+    """
+
+    def __init__(
+        self,
+        embedder,
+        model,
+        cache_path=DEFAULT_CACHE_PATH,
+        batch_size=GEMINI_BATCH_SIZE,
+    ):
+        self.embedder = embedder
+        self.model = model
+        self.batch_size = batch_size
+        self.cache = EmbeddingCache(cache_path)
+
+        self._in_flight = {}  # key -> Future of the thread that is embedding it
+        self._lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "embedded": 0, "coalesced": 0, "api_calls": 0}
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts), "document", self.embedder.embed_documents)
+
+    def embed_query(self, text):
+        return self._embed(
+            [text], "query", lambda batch: [self.embedder.embed_query(q) for q in batch]
+        )[0]
+
+    def embed_queries(self, texts):
+        """Several queries, cached like embed_query() but embedded in one batch."""
+        return self._embed(
+            list(texts), "query", lambda batch: embed_queries(self.embedder, batch)
+        )
+
+    def _key(self, kind, text):
+        # Document and query embeddings differ for Gemini (task_type), so kind is
+        # part of the model namespace
+        return hashlib.sha256(
+            f"{self.model}\0{kind}\0{text}".encode("utf-8")
+        ).hexdigest()
+
+    def _embed(self, texts, kind, embed_batch):
+        keys = [self._key(kind, text) for text in texts]
+        vectors = self.cache.get_many(set(keys))
+
+        # Claim the keys nobody is embedding yet, wait on the others
+        owned = {}
+        waiting = {}
+        with self._lock:
+            self.stats["cache_hits"] += sum(1 for key in keys if key in vectors)
+            for key, text in zip(keys, texts):
+                if key in vectors or key in owned or key in waiting:
+                    continue
+                future = self._in_flight.get(key)
+                if future is None:
+                    self._in_flight[key] = Future()
+                    owned[key] = text
+                else:
+                    waiting[key] = future
+            self.stats["coalesced"] += len(waiting)
+
+        pending = list(owned.items())
+        try:
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start : start + self.batch_size]
+                embedded = embed_batch([text for _, text in batch])
+                batch_keys = [key for key, _ in batch]
+                self.cache.put_many(zip(batch_keys, embedded))
+
+                with self._lock:
+                    self.stats["api_calls"] += 1
+                    self.stats["embedded"] += len(batch)
+                    for key, vector in zip(batch_keys, embedded):
+                        vectors[key] = vector
+                        self._in_flight.pop(key).set_result(vector)
+        except BaseException as error:
+            # Wake up anyone waiting on keys this call never got to
+            with self._lock:
+                for key in owned:
+                    if key not in vectors:
+                        self._in_flight.pop(key).set_exception(error)
+            raise
+
+        for key, future in waiting.items():
+            vectors[key] = future.result()
+
+        return [vectors[key] for key in keys]
+
+
+class OpenAIClientEmbeddings(Embeddings):
+    """
+    Minimal LangChain embedder on top of a raw `OpenAI()` client, so plain
+    client code can go through CachedEmbeddings too.
+    """
+
+    def __init__(self, client, model="text-embedding-3-small"):
+        self.client = client
+        self.model = model
+
+    def embed_documents(self, texts):
+        response = self.client.embeddings.create(input=list(texts), model=self.model)
+        return [
+            item.embedding
+            for item in sorted(response.data, key=lambda item: item.index)
+        ]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def embed_queries(self, texts):
+        return self.embed_documents(texts)
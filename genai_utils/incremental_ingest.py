@@ -0,0 +1,218 @@
+import hashlib
+import json
+import uuid
+from pathlib import Path
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_qdrant import QdrantVectorStore
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams
+
+from genai_utils.semantic_cache import invalidate_cached_answers
+
+QDRANT_URL = "http://localhost:6333"
+MANIFEST_DIR = Path(__file__).parent.parent / ".cache" / "manifests"
+
+
+def fingerprint(*parts):
+    return hashlib.sha256(
+        "\0".join(str(part) for part in parts).encode("utf-8")
+    ).hexdigest()
+
+
+def chunk_point_id(chunk_fingerprint):
+    """Qdrant point ids must be ints or UUIDs, derive a stable UUID from the fingerprint."""
+    return str(uuid.UUID(chunk_fingerprint[:32]))
+
+
+def chunk_id_for(chunk):
+    """
+    Stable point id of a chunk: the same text at the same place of the same
+    file always maps to the same id, whichever path the PDF was opened from.
+    """
+    metadata = chunk.metadata
+    chunk_fp = fingerprint(
+        Path(metadata.get("source", "")).name,
+        metadata.get("page", 0),
+        metadata.get("start_index"),
+        chunk.page_content,
+    )
+    return chunk_point_id(chunk_fp)
+
+
+def default_splitter():
+    # Same 1000/200 chunking as the rest of the repo, plus offsets into the page
+    return RecursiveCharacterTextSplitter(
+        chunk_size=1000, chunk_overlap=200, add_start_index=True
+    )
+
+
+def embedding_model_name(embedding):
+    """
+    What the manifest records as "the model the vectors were made with":
+    the embedder's model name (GoogleGenerativeAIEmbeddings, OpenAIEmbeddings,
+    CachedEmbeddings all have one), else its class name.
+    """
+    model = getattr(embedding, "model", None) or getattr(embedding, "model_name", None)
+    return str(model) if model else type(embedding).__name__
+
+
+def manifest_matches(manifest_path, embedding):
+    """True if a manifest exists and was written for this embedding model."""
+    if not Path(manifest_path).exists():
+        return False
+    return load_manifest(manifest_path).get("model") == embedding_model_name(embedding)
+
+
+def check_rebuild(collection_name, manifest_path, embedding, rebuild):
+    """
+    Refuse to drop a collection this embedding model doesn't own (no
+    manifest, or one written for another model) unless rebuild=True.
+    """
+    if rebuild:
+        return
+    owner = load_manifest(manifest_path).get("model", "no manifest")
+    raise ValueError(
+        f"'{collection_name}' was not indexed with {embedding_model_name(embedding)} "
+        f"({owner}); pass rebuild=True to drop and re-index it, "
+        "or sync into another collection"
+    )
+
+
+def load_manifest(manifest_path):
+    manifest_path = Path(manifest_path)
+    if not manifest_path.exists():
+        return {"pages": {}}
+    return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+
+def save_manifest(manifest, manifest_path):
+    # Write then rename, so a crash never leaves a half-written manifest
+    manifest_path = Path(manifest_path)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+    tmp_path.replace(manifest_path)
+
+
+def sync_documents(pages, vector_store, manifest_path, splitter=None, persist=None):
+    """
+    Bring a collection in line with `pages` (one Document per PDF page, read
+    lazily from any iterable) and only touch what changed since the last run:
+    - pages whose fingerprint matches the manifest are skipped without re-chunking,
+    - chunks of changed pages are upserted only if their fingerprint is new,
+    - chunks that no longer exist are deleted from the collection.
+
+    The manifest also records the embedding model; one written for another
+    model is ignored (its vectors can't be reused), so callers must clear the
+    collection first, as sync_pdf_to_qdrant / sync_pdf_to_local do.
+
+    `persist(stats)` makes the updated collection durable (e.g. saves a
+    LocalVectorStore); it runs before the manifest is written, so a crash in
+    between never leaves a manifest listing chunks the collection lacks.
+
+    Returns counts plus the added/deleted point ids.
+    """
+    splitter = splitter or default_splitter()
+    model = embedding_model_name(vector_store.embeddings)
+    old_manifest = load_manifest(manifest_path)
+    old_pages = old_manifest["pages"] if old_manifest.get("model") == model else {}
+
+    new_pages = {}
+    new_docs = {}
+    changed_pages = 0
+    for page in pages:
+        source = Path(page.metadata.get("source", "")).name
+        page_no = page.metadata.get("page", 0)
+        page_key = f"{source}#{page_no}"
+        page_fp = fingerprint(source, page_no, page.page_content)
+
+        previous = old_pages.get(page_key)
+        if previous and previous["fingerprint"] == page_fp:
+            new_pages[page_key] = previous
+            continue
+
+        changed_pages += 1
+        chunk_ids = []
+        for chunk in splitter.split_documents([page]):
+            point_id = chunk_id_for(chunk)
+            chunk_ids.append(point_id)
+            new_docs[point_id] = chunk
+        new_pages[page_key] = {"fingerprint": page_fp, "chunks": chunk_ids}
+
+    old_ids = {point_id for entry in old_pages.values() for point_id in entry["chunks"]}
+    current_ids = {
+        point_id for entry in new_pages.values() for point_id in entry["chunks"]
+    }
+
+    added = [point_id for point_id in new_docs if point_id not in old_ids]
+    deleted = list(old_ids - current_ids)
+
+    if added:
+        vector_store.add_documents(documents=[new_docs[i] for i in added], ids=added)
+    if deleted:
+        vector_store.delete(ids=deleted)
+    # Cached answers built on chunks that changed are stale now
+    invalidate_cached_answers(added + deleted)
+
+    stats = {
+        "pages": len(new_pages),
+        "changed_pages": changed_pages,
+        "chunks": len(current_ids),
+        "added": added,
+        "deleted": deleted,
+    }
+    if persist is not None:
+        persist(stats)
+    save_manifest({"model": model, "pages": new_pages}, manifest_path)
+    return stats
+
+
+def sync_pdf_to_qdrant(
+    pdf_path,
+    embedding,
+    collection_name,
+    url=QDRANT_URL,
+    manifest_path=None,
+    client=None,
+    rebuild=False,
+):
+    """
+    Incrementally (re-)index a PDF into a Qdrant collection, creating the
+    collection on the first run. Safe to run after every edit of the PDF.
+
+    An existing collection without a manifest for this embedding model
+    (indexed by a plain from_documents() run, or by another model) is only
+    dropped and rebuilt with rebuild=True; otherwise this raises ValueError.
+    """
+    client = client or QdrantClient(url=url)
+    manifest_path = manifest_path or MANIFEST_DIR / f"{collection_name}.json"
+
+    if client.collection_exists(collection_name) and not manifest_matches(
+        manifest_path, embedding
+    ):
+        # Random point ids can't be diffed and vectors of another model (and
+        # size) can't be mixed in: the only way forward is starting over
+        check_rebuild(collection_name, manifest_path, embedding, rebuild)
+        print(
+            f"♻️ Rebuilding '{collection_name}' from scratch with "
+            f"{embedding_model_name(embedding)}."
+        )
+        client.delete_collection(collection_name)
+
+    if not client.collection_exists(collection_name):
+        # Fresh collection: whatever the old manifest says is gone
+        Path(manifest_path).unlink(missing_ok=True)
+        vector_size = len(embedding.embed_query("vector size probe"))
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+        )
+
+    vector_store = QdrantVectorStore(
+        client=client, collection_name=collection_name, embedding=embedding
+    )
+    # Pages are read one at a time, never all held in memory
+    pages = PyPDFLoader(str(pdf_path)).lazy_load()
+    return sync_documents(pages, vector_store, manifest_path)
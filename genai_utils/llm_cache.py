@@ -0,0 +1,171 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from openai.types.chat import ChatCompletion
+
+DEFAULT_LLM_CACHE_PATH = Path(__file__).parent.parent / ".cache" / "llm_responses.sqlite"
+DEFAULT_MAX_ENTRIES = 1024
+# ttl= for cache=True call sites (expansion, routing): a reply is re-asked
+# after a day, so a bad or outdated one is not served forever
+REPLY_TTL = 24 * 60 * 60
+
+
+def request_key(request):
+    """
+    Hash of everything that shapes the completion: model, messages,
+    response_format, temperature and any other sampling argument.
+    """
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def reply_json(response):
+    """The completion's content parsed as JSON, None if it isn't valid JSON."""
+    try:
+        return json.loads(response.choices[0].message.content)
+    except (TypeError, json.JSONDecodeError):
+        return None
+
+
+class ResponseCache:
+    """
+    In-memory LRU of chat completions, optionally backed by SQLite so warm
+    entries survive restarts and are shared between scripts. Thread-safe.
+    """
+
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory = OrderedDict()  # key -> (created, ChatCompletion)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+
+        self._conn = None
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses "
+                    "(key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+                )
+
+    def _fresh(self, created, ttl=None):
+        ttls = [limit for limit in (self.ttl, ttl) if limit is not None]
+        return not ttls or time.time() - created < min(ttls)
+
+    def get(self, key, ttl=None, valid=None):
+        """
+        Cached response, or None. `ttl` shortens the cache's own ttl for this
+        lookup; an entry `valid(response)` rejects is evicted, not served.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._fresh(entry[0], ttl):
+                if valid is None or valid(entry[1]):
+                    self._memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1]
+                self._evict(key)
+
+            elif self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT response, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and self._fresh(row[1], ttl):
+                    response = ChatCompletion.model_validate_json(row[0])
+                    if valid is None or valid(response):
+                        self._remember(key, row[1], response)
+                        self.stats["hits"] += 1
+                        self.stats["disk_hits"] += 1
+                        return response
+                    self._evict(key)
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, response):
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, response)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)",
+                        (key, response.model_dump_json(), created),
+                    )
+
+    def _evict(self, key):
+        self._memory.pop(key, None)
+        if self._conn is not None:
+            with self._conn:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def _remember(self, key, created, response):
+        self._memory[key] = (created, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+class _CachedCompletions:
+    def __init__(self, completions, cache):
+        self._completions = completions
+        self._cache = cache
+
+    def create(self, *, cache=False, ttl=None, cache_if=None, **request):
+        """
+        chat.completions.create(); pass cache=True at call sites whose prompt
+        is deterministic enough to reuse (classification, routing, expansion).
+        ttl: seconds this call's reply may be reused (e.g. REPLY_TTL).
+        cache_if(response): only replies it accepts are stored or served, so
+        one the caller can't use (unparseable JSON, unknown route) is re-asked.
+        """
+        if not cache or request.get("stream"):
+            return self._completions.create(**request)
+
+        key = request_key(request)
+        response = self._cache.get(key, ttl=ttl, valid=cache_if)
+        if response is None:
+            response = self._completions.create(**request)
+            if cache_if is None or cache_if(response):
+                self._cache.put(key, response)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._completions, name)
+
+
+class _CachedChat:
+    def __init__(self, chat, cache):
+        self._chat = chat
+        self.completions = _CachedCompletions(chat.completions, cache)
+
+    def __getattr__(self, name):
+        return getattr(self._chat, name)
+
+
+class CachedChatClient:
+    """
+    Drop-in wrapper around an OpenAI-compatible client (OpenAI, the Gemini
+    endpoint, langsmith's wrap_openai) whose chat.completions.create() serves
+    identical requests from a ResponseCache when called with cache=True.
+    Everything else is passed through to the wrapped client.
+    """
+
+    def __init__(self, client, path=None, max_entries=DEFAULT_MAX_ENTRIES, ttl=None):
+        self._client = client
+        self.cache = ResponseCache(path=path, max_entries=max_entries, ttl=ttl)
+        self.chat = _CachedChat(client.chat, self.cache)
+
+    @property
+    def stats(self):
+        return self.cache.stats
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
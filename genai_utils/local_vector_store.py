@@ -0,0 +1,367 @@
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+from langchain_qdrant import QdrantVectorStore
+
+from genai_utils.ann_index import IVFPQIndex
+from genai_utils.incremental_ingest import (
+    MANIFEST_DIR,
+    QDRANT_URL,
+    check_rebuild,
+    manifest_matches,
+    sync_documents,
+    sync_pdf_to_qdrant,
+)
+
+LOCAL_INDEX_DIR = Path(__file__).parent.parent / ".cache" / "vectors"
+
+# "qdrant" (default) or "local": which backend open_vector_store() returns
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant")
+
+# Below this many vectors a full scan is fast enough, no ANN index is built
+ANN_MIN_VECTORS = 20_000
+# ANN candidates per requested result that get re-ranked with exact scores
+ANN_REFINE_FACTOR = 32
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store with the same similarity_search() surface as
+    QdrantVectorStore, for corpora small enough to scan (up to ~1M chunks).
+
+    Vectors are kept L2-normalized in one float32 matrix, so a search is a
+    single matrix-vector product plus argpartition for the top k. Saved
+    indexes are loaded with np.load(mmap_mode="r"): opening one costs nothing
+    and the OS page cache is shared between processes.
+
+    Large stores can add an IVF-PQ index (build_ann) that narrows a search
+    down to a few inverted lists before the exact re-rank; `nprobe` trades
+    recall for latency per call.
+    """
+
+    def __init__(self, embedding, path=None):
+        self.embedding = embedding
+        self.path = Path(path) if path else None
+        self._vectors = None  # (n, dim) float32, unit-length rows
+        self._ids = []
+        self._texts = []
+        self._metadatas = []
+        self._positions = {}  # point id -> row
+        self._ann = None  # optional IVFPQIndex over the same rows
+
+    @property
+    def embeddings(self):
+        return self.embedding
+
+    def __len__(self):
+        return len(self._ids)
+
+    # ----- Writing -----
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        ids = [str(i) for i in ids] if ids else [str(uuid.uuid4()) for _ in texts]
+
+        # An id given twice in one call: the last one wins, like in Qdrant
+        last = {point_id: i for i, point_id in enumerate(ids)}
+        if len(last) < len(ids):
+            keep = sorted(last.values())
+            texts = [texts[i] for i in keep]
+            metadatas = [metadatas[i] for i in keep]
+            unique_ids = [ids[i] for i in keep]
+        else:
+            unique_ids = ids
+        vectors = _normalize(self.embedding.embed_documents(texts))
+
+        # mmapped indexes are read-only: take a private copy before writing
+        if self._vectors is not None and not self._vectors.flags.writeable:
+            self._vectors = np.array(self._vectors)
+
+        new_rows = []
+        updated_rows, updated_vectors = [], []
+        for point_id, text, metadata, vector in zip(
+            unique_ids, texts, metadatas, vectors
+        ):
+            row = self._positions.get(point_id)
+            if row is None:
+                self._positions[point_id] = len(self._ids)
+                self._ids.append(point_id)
+                self._texts.append(text)
+                self._metadatas.append(metadata)
+                new_rows.append(vector)
+            else:
+                # Upsert, like Qdrant does for an existing point id
+                self._texts[row] = text
+                self._metadatas[row] = metadata
+                self._vectors[row] = vector
+                updated_rows.append(row)
+                updated_vectors.append(vector)
+
+        if new_rows:
+            new_rows = np.stack(new_rows)
+            self._vectors = (
+                new_rows
+                if self._vectors is None
+                else np.concatenate([self._vectors, new_rows])
+            )
+
+        if self._ann is not None:
+            if updated_rows:
+                self._ann.update(updated_rows, np.stack(updated_vectors))
+            if len(new_rows):
+                self._ann.add(new_rows)
+        return ids
+
+    def delete(self, ids=None, **kwargs):
+        if ids is None:
+            return False
+        drop = {self._positions[i] for i in map(str, ids) if i in self._positions}
+        if not drop:
+            return True
+
+        keep = [row for row in range(len(self._ids)) if row not in drop]
+        self._vectors = self._vectors[keep] if keep else None
+        self._ids = [self._ids[row] for row in keep]
+        self._texts = [self._texts[row] for row in keep]
+        self._metadatas = [self._metadatas[row] for row in keep]
+        self._positions = {point_id: row for row, point_id in enumerate(self._ids)}
+        if self._ann is not None:
+            self._ann.keep(keep)
+        return True
+
+    def build_ann(self, n_lists=None, m=None, nprobe=8):
+        """Train an IVF-PQ index on the current vectors; later inserts go into it."""
+        self._ann = IVFPQIndex.train(self._vectors, n_lists=n_lists, m=m, nprobe=nprobe)
+        self._ann.add(self._vectors)
+        return self._ann
+
+    # ----- Searching -----
+
+    def _document(self, row):
+        return Document(
+            page_content=self._texts[row],
+            metadata={**self._metadatas[row], "_id": self._ids[row]},
+        )
+
+    def _top_k(self, query_vector, k, nprobe=None, exact=False, **kwargs):
+        # (argpartition(x, -0)[-0:] would be every row, not none)
+        if not self._ids or k <= 0:
+            return [], []
+        query = _normalize(query_vector)
+
+        if self._ann is not None and not exact:
+            # Exact scores for the ANN candidates only
+            # (rows sorted, so the reads from the mmapped matrix go forward)
+            rows = np.sort(self._ann.search(query, k * ANN_REFINE_FACTOR, nprobe))
+            if not len(rows):
+                return [], []
+            scores = self._vectors[rows] @ query
+            k = min(k, len(rows))
+            top = np.argpartition(scores, -k)[-k:]
+            top = top[np.argsort(scores[top])[::-1]]
+            return rows[top], scores[top]
+
+        scores = self._vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return top, scores[top]
+
+    def _top_k_batch(self, query_vectors, k, nprobe=None, exact=False, **kwargs):
+        queries = _normalize(query_vectors)
+        if not self._ids or k <= 0 or (self._ann is not None and not exact):
+            return [self._top_k(query, k, nprobe=nprobe) for query in queries]
+
+        # One (n, dim) x (dim, queries) product scores every query at once
+        scores = self._vectors @ queries.T
+        k = min(k, len(scores))
+        top = np.argpartition(scores, -k, axis=0)[-k:]
+        results = []
+        for column in range(len(queries)):
+            rows = top[:, column]
+            rows = rows[np.argsort(scores[rows, column])[::-1]]
+            results.append((rows, scores[rows, column]))
+        return results
+
+    def similarity_search_by_vectors(self, embeddings, k=4, **kwargs):
+        """similarity_search_by_vector() for several query vectors in one pass."""
+        return [
+            [self._document(row) for row in rows]
+            for rows, _ in self._top_k_batch(embeddings, k, **kwargs)
+        ]
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, **kwargs):
+        rows, scores = self._top_k(embedding, k, **kwargs)
+        return [(self._document(row), float(score)) for row, score in zip(rows, scores)]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        rows, _ = self._top_k(embedding, k, **kwargs)
+        return [self._document(row) for row in rows]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.similarity_search_with_score_by_vector(
+            self.embedding.embed_query(query), k, **kwargs
+        )
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return self.similarity_search_by_vector(
+            self.embedding.embed_query(query), k, **kwargs
+        )
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities in [-1, 1]
+        return lambda score: (score + 1) / 2
+
+    # ----- Persistence -----
+
+    def save(self, path=None):
+        """Write vectors.npy + docs.jsonl (write then rename, never half-written)."""
+        path = Path(path or self.path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        vectors = self._vectors
+        if vectors is None:
+            vectors = np.zeros((0, 0), dtype=np.float32)
+        with open(path / "vectors.tmp", "wb") as f:
+            np.save(f, vectors)
+        with open(path / "docs.tmp", "w", encoding="utf-8") as f:
+            for point_id, text, metadata in zip(
+                self._ids, self._texts, self._metadatas
+            ):
+                f.write(
+                    json.dumps({"id": point_id, "text": text, "metadata": metadata})
+                )
+                f.write("\n")
+
+        # A file that is still mmapped can't be replaced on Windows: move the
+        # vectors into memory first (the old mapping closes with its last reference)
+        if isinstance(self._vectors, np.memmap):
+            self._vectors = np.array(self._vectors)
+        (path / "vectors.tmp").replace(path / "vectors.npy")
+        (path / "docs.tmp").replace(path / "docs.jsonl")
+        if self._ann is not None:
+            self._ann.save(path / "ivfpq")
+        elif (path / "ivfpq").exists():
+            shutil.rmtree(path / "ivfpq")
+        self.path = path
+
+    @classmethod
+    def load(cls, path, embedding):
+        path = Path(path)
+        store = cls(embedding, path)
+        vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        store._vectors = vectors if len(vectors) else None
+        with open(path / "docs.jsonl", encoding="utf-8") as f:
+            for line in f:
+                doc = json.loads(line)
+                store._positions[doc["id"]] = len(store._ids)
+                store._ids.append(doc["id"])
+                store._texts.append(doc["text"])
+                store._metadatas.append(doc["metadata"])
+        if (path / "ivfpq").exists():
+            store._ann = IVFPQIndex.load(path / "ivfpq")
+        return store
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts,
+        embedding,
+        metadatas=None,
+        ids=None,
+        collection_name=None,
+        path=None,
+        **kwargs,
+    ):
+        """Build an index; it is saved when a collection_name or path is given."""
+        if path is None and collection_name is not None:
+            path = LOCAL_INDEX_DIR / collection_name
+        store = cls(embedding, path)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        if path is not None:
+            store.save()
+        return store
+
+    @classmethod
+    def from_existing_collection(cls, embedding, collection_name, path=None, **kwargs):
+        """Same call as QdrantVectorStore.from_existing_collection (url is ignored)."""
+        return cls.load(path or LOCAL_INDEX_DIR / collection_name, embedding)
+
+
+def sync_pdf_to_local(
+    pdf_path,
+    embedding,
+    collection_name,
+    path=None,
+    manifest_path=None,
+    rebuild=False,
+    **kwargs,
+):
+    """
+    Local counterpart of sync_pdf_to_qdrant: incrementally (re-)index a PDF
+    into a LocalVectorStore saved under .cache/vectors/<collection_name>.
+    Takes the same call as sync_pdf_to_qdrant (url is ignored), including
+    rebuild=True to start over an index of another embedding model.
+    """
+    path = Path(path or LOCAL_INDEX_DIR / collection_name)
+    manifest_path = manifest_path or MANIFEST_DIR / f"{collection_name}.local.json"
+
+    if (path / "docs.jsonl").exists() and manifest_matches(manifest_path, embedding):
+        vector_store = LocalVectorStore.load(path, embedding)
+    else:
+        if (path / "docs.jsonl").exists():
+            check_rebuild(collection_name, manifest_path, embedding, rebuild)
+        # Index and manifest only make sense together, and only for the same
+        # embedding model: start both over
+        Path(manifest_path).unlink(missing_ok=True)
+        vector_store = LocalVectorStore(embedding, path)
+
+    def persist(stats):
+        # Saved before sync_documents writes the manifest, never after
+        changed = bool(stats["added"] or stats["deleted"])
+        if vector_store._ann is None and len(vector_store) >= ANN_MIN_VECTORS:
+            vector_store.build_ann()
+            changed = True
+        if changed or not (path / "docs.jsonl").exists():
+            vector_store.save()
+
+    pages = PyPDFLoader(str(pdf_path)).lazy_load()
+    return sync_documents(pages, vector_store, manifest_path, persist=persist)
+
+
+def open_vector_store(collection_name, embedding, url=QDRANT_URL, backend=None):
+    """
+    Existing collection on the configured backend (VECTOR_BACKEND env var),
+    so scripts run against Qdrant or fully in-process without code changes.
+    """
+    backend = backend or VECTOR_BACKEND
+    if backend == "local":
+        return LocalVectorStore.from_existing_collection(embedding, collection_name)
+    return QdrantVectorStore.from_existing_collection(
+        url=url, collection_name=collection_name, embedding=embedding
+    )
+
+
+def sync_pdf(pdf_path, embedding, collection_name, backend=None, **kwargs):
+    """sync_pdf_to_qdrant or sync_pdf_to_local, depending on VECTOR_BACKEND."""
+    backend = backend or VECTOR_BACKEND
+    if backend == "local":
+        return sync_pdf_to_local(pdf_path, embedding, collection_name, **kwargs)
+    return sync_pdf_to_qdrant(pdf_path, embedding, collection_name, **kwargs)
@@ -0,0 +1,80 @@
+import numpy as np
+
+# Rough size of a chunk in tokens when no exact counts are given
+CHARS_PER_TOKEN = 4
+
+
+def _unit(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def mmr_select(
+    query_vector,
+    doc_vectors,
+    k=4,
+    lambda_mult=0.5,
+    max_tokens=None,
+    token_counts=None,
+):
+    """
+    Maximal Marginal Relevance: repeatedly pick the document maximizing
+    lambda * sim(query, d) - (1 - lambda) * max sim(d, already picked).
+
+    The redundancy term is kept as a running max, updated with one
+    matrix-vector product per pick, so the full pairwise matrix is never
+    built. Stops after k picks, or when no remaining document fits in
+    `max_tokens` (with `token_counts` per document). Returns the indexes
+    of the picked documents, in pick order.
+    """
+    docs = _unit(doc_vectors)
+    if not len(docs):
+        return []
+    relevance = docs @ _unit(query_vector)
+    redundancy = np.zeros(len(docs), dtype=np.float32)
+    available = np.ones(len(docs), dtype=bool)
+    token_counts = None if token_counts is None else np.asarray(token_counts)
+    budget = max_tokens
+
+    selected = []
+    while len(selected) < (k or len(docs)):
+        if budget is not None:
+            available &= token_counts <= budget
+        if not available.any():
+            break
+
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(scores.argmax())
+
+        selected.append(best)
+        available[best] = False
+        if budget is not None:
+            budget -= token_counts[best]
+        similarity = docs @ docs[best]
+        redundancy = (
+            similarity if len(selected) == 1 else np.maximum(redundancy, similarity)
+        )
+    return selected
+
+
+def select_diverse(query, docs, embedding, k=4, lambda_mult=0.5, max_tokens=None):
+    """
+    MMR over retrieved Documents. Their vectors come from `embedding`
+    (CachedEmbeddings: the chunks were embedded at ingest, so these are
+    cache hits, not API calls).
+    """
+    if not docs:
+        return []
+    doc_vectors = embedding.embed_documents([doc.page_content for doc in docs])
+    token_counts = [len(doc.page_content) // CHARS_PER_TOKEN + 1 for doc in docs]
+    picked = mmr_select(
+        embedding.embed_query(query),
+        doc_vectors,
+        k=k,
+        lambda_mult=lambda_mult,
+        max_tokens=max_tokens,
+        token_counts=token_counts,
+    )
+    return [docs[i] for i in picked]
@@ -0,0 +1,133 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pypdf import PdfReader
+
+PAGES_PER_TASK = 8
+
+# Each worker opens the PDF once and reuses the reader for all its page ranges
+_worker_readers = {}
+
+
+def _reader_for(pdf_path):
+    reader = _worker_readers.get(pdf_path)
+    if reader is None:
+        reader = _worker_readers[pdf_path] = PdfReader(pdf_path)
+    return reader
+
+
+def _extract_and_chunk(
+    pdf_path, first_page, last_page, chunk_size, chunk_overlap, with_text
+):
+    """
+    Worker: extract a page range and chunk it right there. Page text only
+    travels back to the parent process when the caller asked for it.
+    """
+    reader = _reader_for(pdf_path)
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True
+    )
+    total_pages = len(reader.pages)
+
+    pages = []
+    for page_no in range(first_page, last_page):
+        # strip() like PyPDFLoader does, so start_index and chunk ids match
+        text = reader.pages[page_no].extract_text().strip()
+        metadata = {"source": pdf_path, "page": page_no, "total_pages": total_pages}
+        chunks = [
+            (chunk.page_content, chunk.metadata)
+            for chunk in splitter.create_documents([text], metadatas=[metadata])
+        ]
+        pages.append((metadata, text if with_text else None, chunks))
+    return pages
+
+
+def _iter_pages(
+    pdf_path, workers, pages_per_task, chunk_size, chunk_overlap, with_text
+):
+    pdf_path = str(pdf_path)
+    workers = workers or os.cpu_count() or 1
+    total_pages = len(PdfReader(pdf_path).pages)
+    ranges = [
+        (first, min(first + pages_per_task, total_pages))
+        for first in range(0, total_pages, pages_per_task)
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        next_range = iter(ranges)
+
+        def submit_next():
+            page_range = next(next_range, None)
+            if page_range is not None:
+                in_flight.append(
+                    pool.submit(
+                        _extract_and_chunk,
+                        pdf_path,
+                        *page_range,
+                        chunk_size,
+                        chunk_overlap,
+                        with_text,
+                    )
+                )
+
+        for _ in range(2 * workers):
+            submit_next()
+
+        while in_flight:
+            pages = in_flight.popleft().result()
+            submit_next()
+            yield from pages
+
+
+def iter_pdf_chunks(
+    pdf_path,
+    workers=None,
+    pages_per_task=PAGES_PER_TASK,
+    chunk_size=1000,
+    chunk_overlap=200,
+):
+    """
+    Extract and chunk a PDF across a process pool and yield the chunks as
+    Documents in page order (same text, page and start_index as
+    PyPDFLoader + RecursiveCharacterTextSplitter(add_start_index=True)).
+
+    At most `2 * workers` page ranges are in flight, so memory stays bounded
+    by the window instead of the whole document.
+    """
+    pages = _iter_pages(
+        pdf_path, workers, pages_per_task, chunk_size, chunk_overlap, False
+    )
+    for _, _, chunks in pages:
+        for page_content, metadata in chunks:
+            yield Document(page_content=page_content, metadata=metadata)
+
+
+def iter_pdf_pages(
+    pdf_path,
+    workers=None,
+    pages_per_task=PAGES_PER_TASK,
+    chunk_size=1000,
+    chunk_overlap=200,
+):
+    """
+    Like iter_pdf_chunks, but yields (page Document, chunks of that page)
+    pairs, for consumers that also keep the page text (e.g. ChunkStore).
+    """
+    pages = _iter_pages(
+        pdf_path, workers, pages_per_task, chunk_size, chunk_overlap, True
+    )
+    for page_metadata, text, chunks in pages:
+        yield Document(page_content=text, metadata=page_metadata), [
+            Document(page_content=page_content, metadata=metadata)
+            for page_content, metadata in chunks
+        ]
+
+
+def load_and_split_pdf(pdf_path, workers=None):
+    """Parallel drop-in for the scripts' PyPDFLoader + splitter helper."""
+    return list(iter_pdf_chunks(Path(pdf_path), workers=workers))
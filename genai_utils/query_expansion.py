@@ -0,0 +1,148 @@
+import math
+from collections import Counter
+
+import numpy as np
+
+from genai_utils.bm25_index import tokenize
+
+# Retrieval counts as confident when the best hit is at least this similar
+# to the query and stands out from the rest of the top k by this margin
+DEFAULT_MIN_TOP_SCORE = 0.75
+DEFAULT_MIN_MARGIN = 0.02
+
+# Pseudo-relevance feedback: chunks used as feedback, queries built, and
+# expansion terms added to each of them
+PRF_DOCS = 5
+PRF_QUERIES = 3
+PRF_TERMS_PER_QUERY = 4
+STOPWORDS = frozenset("""
+    a an and are as at be been but by can do does for from has have how if in
+    into is it its not of on or that the their then there these this to use
+    used using was we what when where which while will with you your
+    """.split())
+
+
+def retrieval_confidence(scores):
+    """
+    Score-margin statistics of one ranked result list (best first):
+    top score, gap to the runner-up, and margin over the mean of the rest.
+    """
+    scores = np.asarray(scores, dtype=np.float32)
+    if not len(scores):
+        return {"top": 0.0, "gap": 0.0, "margin": 0.0}
+    rest = scores[1:] if len(scores) > 1 else scores
+    return {
+        "top": float(scores[0]),
+        "gap": float(scores[0] - rest[0]),
+        "margin": float(scores[0] - rest.mean()),
+    }
+
+
+def is_confident(
+    confidence, min_top=DEFAULT_MIN_TOP_SCORE, min_margin=DEFAULT_MIN_MARGIN
+):
+    return confidence["top"] >= min_top and confidence["margin"] >= min_margin
+
+
+def expansion_gate(
+    scores, min_top=DEFAULT_MIN_TOP_SCORE, min_margin=DEFAULT_MIN_MARGIN
+):
+    """retrieval_confidence() of the raw query's scores, plus the "expanded" decision."""
+    confidence = retrieval_confidence(scores)
+    confidence["expanded"] = not is_confident(confidence, min_top, min_margin)
+    return confidence
+
+
+def gated_expansion(
+    retriever,
+    user_query,
+    expand,
+    k=4,
+    min_top=DEFAULT_MIN_TOP_SCORE,
+    min_margin=DEFAULT_MIN_MARGIN,
+):
+    """
+    Search with the raw query first and only call `expand(results)` (the LLM
+    paraphrase step, or prf_variants on those (Document, score) results)
+    when that retrieval is not confident.
+
+    Returns the raw query's hits (to be used as they are, not searched
+    again), the extra queries to search (none when confident or when
+    expansion came back empty), and the confidence statistics.
+    """
+    results = retriever.similarity_search_with_score(user_query, k=k)
+    confidence = expansion_gate([score for _, score in results], min_top, min_margin)
+    hits = [doc for doc, _ in results]
+    if not confidence["expanded"]:
+        return hits, [], confidence
+    return hits, expand(results), confidence
+
+
+def feedback_terms(feedback, bm25=None, exclude=()):
+    """
+    RM3-style relevance model: P(w|R) = sum over feedback chunks of
+    P(w|chunk) * (chunk score / total score), optionally times the term's
+    idf in the BM25 index so corpus-wide filler words sink.
+    `feedback` is (text, score) pairs. Returns terms, best first.
+    """
+    weights = Counter()
+    total = sum(max(score, 0.0) for _, score in feedback) or 1.0
+    for text, score in feedback:
+        counts = Counter(
+            term
+            for term in tokenize(text)
+            if len(term) > 2 and not term.isdigit() and term not in STOPWORDS
+        )
+        length = sum(counts.values()) or 1
+        for term, tf in counts.items():
+            weights[term] += tf / length * max(score, 0.0) / total
+
+    if bm25 is not None:
+        for term in weights:
+            df = bm25.terms[term][2] if term in bm25.terms else 1
+            weights[term] *= math.log(1 + (len(bm25) - df + 0.5) / (df + 0.5))
+    return [term for term, _ in weights.most_common() if term not in exclude]
+
+
+def prf_variants(
+    user_query,
+    results,
+    n_queries=PRF_QUERIES,
+    terms_per_query=PRF_TERMS_PER_QUERY,
+    bm25=None,
+):
+    """
+    Local query expansion without an LLM, from the raw query's (Document,
+    score) search results: n_queries variants of the query, each extended
+    with a different slice of the feedback chunks' best terms. Same output
+    as expand_query (a list of query strings), in milliseconds.
+    """
+    feedback = [(doc.page_content, score) for doc, score in results]
+    terms = feedback_terms(feedback, bm25=bm25, exclude=set(tokenize(user_query)))
+
+    variants = []
+    for i in range(n_queries):
+        extra = terms[i * terms_per_query : (i + 1) * terms_per_query]
+        if not extra:
+            break
+        variants.append(f"{user_query} {' '.join(extra)}")
+    return variants
+
+
+def prf_expansion(
+    retriever,
+    user_query,
+    k=PRF_DOCS,
+    n_queries=PRF_QUERIES,
+    terms_per_query=PRF_TERMS_PER_QUERY,
+    bm25=None,
+):
+    """prf_variants() after one search with the raw query for the feedback chunks."""
+    results = retriever.similarity_search_with_score(user_query, k=k)
+    return prf_variants(
+        user_query,
+        results,
+        n_queries=n_queries,
+        terms_per_query=terms_per_query,
+        bm25=bm25,
+    )
@@ -0,0 +1,65 @@
+import threading
+
+from genai_utils.bm25_index import hybrid_search
+from genai_utils.chunk_artifact import ChunkArtifact
+from genai_utils.local_vector_store import QDRANT_URL, open_vector_store
+from genai_utils.mmr import select_diverse
+
+
+class RetrievalService:
+    """
+    Everything a query needs, created once and shared: the embedder, the
+    vector store connection, the chunk artifact (with its BM25 index) and
+    the chat client. Their HTTP/gRPC connection pools stay warm between
+    queries instead of being rebuilt per call.
+
+    Safe to share across threads: the store and artifact are opened once
+    under a lock, and the clients themselves are thread-safe.
+    """
+
+    def __init__(
+        self,
+        collection_name,
+        pdf_path,
+        embedding,
+        chat_client=None,
+        url=QDRANT_URL,
+        backend=None,
+    ):
+        self.collection_name = collection_name
+        self.embedding = embedding
+        self.chat_client = chat_client
+        self.url = url
+        self.backend = backend
+        self.chunks = ChunkArtifact.for_pdf(pdf_path)
+        self._vector_store = None
+        self._lock = threading.Lock()
+
+    @property
+    def vector_store(self):
+        if self._vector_store is None:
+            with self._lock:
+                if self._vector_store is None:
+                    self._vector_store = open_vector_store(
+                        self.collection_name,
+                        self.embedding,
+                        url=self.url,
+                        backend=self.backend,
+                    )
+        return self._vector_store
+
+    def retrieve(self, query, k=4, fetch_k=12):
+        """Hybrid (dense + BM25) candidates, narrowed to k diverse chunks with MMR."""
+        candidates = hybrid_search(self.vector_store, self.chunks, query, k=fetch_k)
+        return select_diverse(query, candidates, self.embedding, k=k)
+
+    def chat(self, **request):
+        return self.chat_client.chat.completions.create(**request)
+
+    def close(self):
+        self.chunks.close()
+        client = getattr(self._vector_store, "client", None)
+        if client is not None:
+            client.close()
+        if self.chat_client is not None:
+            self.chat_client.close()
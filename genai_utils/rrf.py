@@ -0,0 +1,85 @@
+import numpy as np
+
+# Constant of the original RRF paper (Cormack et al.), dampens the top ranks
+RRF_K = 60
+
+
+def combine_weights(retriever_weights, variant_weights):
+    """
+    Per-list weights for lists ordered retriever-major, i.e.
+    [r0 v0, r0 v1, ..., r1 v0, ...]: weight = retriever weight * variant weight.
+    """
+    return np.outer(retriever_weights, variant_weights).ravel()
+
+
+def reciprocal_rank_fusion(ranked_lists, k=RRF_K, top_k=10, weights=None):
+    """
+    Fuse ranked lists of integer chunk ids (best first) with
+    score(id) = sum over lists of weight / (k + rank), rank starting at 1.
+
+    All lists are scored in one scatter-add (np.bincount) and only the top_k
+    are sorted, so hundreds of lists with thousands of candidates each stay
+    cheap. Returns (ids, scores) of the top_k, best first.
+    """
+    lengths = np.array([len(ranked) for ranked in ranked_lists], dtype=np.int64)
+    if not lengths.sum() or top_k <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+    ids = np.concatenate(
+        [np.asarray(ranked, dtype=np.int64) for ranked in ranked_lists]
+    )
+    # Rank of every entry inside its own list
+    ranks = np.arange(len(ids)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    contributions = 1.0 / (k + ranks + 1)
+    if weights is not None:
+        contributions *= np.repeat(np.asarray(weights, dtype=np.float64), lengths)
+
+    if ids.max() < 4 * len(ids):
+        # Dense ids (chunk indexes): accumulate straight into an id-indexed array
+        scores = np.bincount(ids, weights=contributions)
+        candidates = np.flatnonzero(scores)
+        scores = scores[candidates]
+    else:
+        candidates, inverse = np.unique(ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions)
+
+    top_k = min(top_k, len(candidates))
+    top = np.argpartition(scores, -top_k)[-top_k:]
+    # Best first; equal scores keep the lower id first
+    top = top[np.lexsort((candidates[top], -scores[top]))]
+    return candidates[top], scores[top]
+
+
+class HitIds:
+    """
+    Integer ids of search hits, for fusing result lists: the artifact index
+    when the hit's point id is in the artifact, else an id past its end,
+    shared by hits with the same text. The latter covers collections indexed
+    by older code (random point ids) or not re-synced since the PDF changed.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self._unknown = {}  # text -> id
+        self._docs = []  # Documents of the unknown ids, in id order
+
+    def id_of(self, doc):
+        try:
+            return self.chunks.index_of(doc.metadata.get("_id"))
+        except KeyError:
+            hit_id = self._unknown.get(doc.page_content)
+            if hit_id is None:
+                hit_id = len(self.chunks) + len(self._docs)
+                self._unknown[doc.page_content] = hit_id
+                self._docs.append(doc)
+            return hit_id
+
+    def document(self, hit_id):
+        if hit_id < len(self.chunks):
+            return self.chunks[hit_id]
+        return self._docs[hit_id - len(self.chunks)]
+
+    def text(self, hit_id):
+        if hit_id < len(self.chunks):
+            return self.chunks.text(hit_id)
+        return self._docs[hit_id - len(self.chunks)].page_content
@@ -0,0 +1,212 @@
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from genai_utils.embedding_cache import SQLITE_MAX_VARIABLES
+
+DEFAULT_ANSWER_CACHE_PATH = Path(__file__).parent.parent / ".cache" / "answers.sqlite"
+
+# Cosine similarity above which two queries count as the same question
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_TTL = 24 * 60 * 60
+
+CachedAnswer = namedtuple("CachedAnswer", "query answer similarity chunk_ids age")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    query TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    answer TEXT NOT NULL,
+    cost REAL NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS answer_chunks (answer_id INTEGER NOT NULL, chunk_id TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS answer_chunks_by_chunk ON answer_chunks (chunk_id);
+"""
+
+
+def _connect(path):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _delete_answers(conn, answer_ids):
+    for start in range(0, len(answer_ids), SQLITE_MAX_VARIABLES):
+        batch = answer_ids[start : start + SQLITE_MAX_VARIABLES]
+        placeholders = ",".join("?" * len(batch))
+        conn.execute(f"DELETE FROM answers WHERE id IN ({placeholders})", batch)
+        conn.execute(
+            f"DELETE FROM answer_chunks WHERE answer_id IN ({placeholders})", batch
+        )
+
+
+def _answers_for_chunks(conn, chunk_ids):
+    answer_ids = set()
+    for start in range(0, len(chunk_ids), SQLITE_MAX_VARIABLES):
+        batch = chunk_ids[start : start + SQLITE_MAX_VARIABLES]
+        placeholders = ",".join("?" * len(batch))
+        rows = conn.execute(
+            f"SELECT answer_id FROM answer_chunks WHERE chunk_id IN ({placeholders})",
+            batch,
+        )
+        answer_ids.update(answer_id for (answer_id,) in rows)
+    return list(answer_ids)
+
+
+def invalidate_cached_answers(chunk_ids, path=DEFAULT_ANSWER_CACHE_PATH):
+    """
+    Drop every cached answer built on any of these chunk (point) ids.
+    Called by the ingestion whenever chunks are added or deleted.
+    """
+    chunk_ids = list(chunk_ids)
+    if not chunk_ids or not Path(path).exists():
+        return 0
+
+    conn = _connect(path)
+    try:
+        with conn:
+            answer_ids = _answers_for_chunks(conn, chunk_ids)
+            _delete_answers(conn, answer_ids)
+    finally:
+        conn.close()
+    return len(answer_ids)
+
+
+class SemanticCache:
+    """
+    Answers keyed by query embedding: a new query whose cosine similarity to
+    a cached one is at least `threshold` gets the cached answer, skipping
+    retrieval and generation.
+
+    Entries live in SQLite (shared across runs and processes) and expire
+    after `ttl` seconds; the vectors of one namespace are also kept in a
+    normalized matrix, so a lookup is one matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        namespace="default",
+        path=DEFAULT_ANSWER_CACHE_PATH,
+        threshold=DEFAULT_THRESHOLD,
+        ttl=DEFAULT_TTL,
+    ):
+        self.namespace = namespace
+        self.threshold = threshold
+        self.ttl = ttl
+        self._conn = _connect(path)
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "saved_seconds": 0.0}
+        self._reload()
+
+    def _reload(self):
+        rows = self._conn.execute(
+            "SELECT id, vector, created FROM answers WHERE namespace = ? AND created > ?",
+            (self.namespace, time.time() - self.ttl),
+        ).fetchall()
+        self._ids = [answer_id for answer_id, _, _ in rows]
+        self._created = np.array([created for _, _, created in rows])
+        self._vectors = (
+            np.stack([np.frombuffer(vector, dtype=np.float32) for _, vector, _ in rows])
+            if rows
+            else None
+        )
+
+    def lookup(self, query_vector):
+        """Cached answer for a near-identical query, or None."""
+        start = time.perf_counter()
+        with self._lock:
+            self.stats["lookups"] += 1
+            if self._vectors is None:
+                return None
+
+            query = np.asarray(query_vector, dtype=np.float32)
+            similarities = self._vectors @ (query / (np.linalg.norm(query) or 1.0))
+            similarities[self._created <= time.time() - self.ttl] = -np.inf
+            best = int(similarities.argmax())
+            if similarities[best] < self.threshold:
+                return None
+
+            row = self._conn.execute(
+                "SELECT query, answer, cost, created FROM answers WHERE id = ?",
+                (self._ids[best],),
+            ).fetchone()
+            if row is None:
+                # Invalidated by an ingestion run in another process
+                self._reload()
+                return None
+            query_text, answer, cost, created = row
+            chunk_ids = [
+                chunk_id
+                for (chunk_id,) in self._conn.execute(
+                    "SELECT chunk_id FROM answer_chunks WHERE answer_id = ?",
+                    (self._ids[best],),
+                )
+            ]
+
+            self.stats["hits"] += 1
+            self.stats["saved_seconds"] += cost - (time.perf_counter() - start)
+        return CachedAnswer(
+            query_text,
+            answer,
+            float(similarities[best]),
+            chunk_ids,
+            time.time() - created,
+        )
+
+    def put(self, query, query_vector, answer, chunk_ids=(), cost=0.0):
+        """Cache an answer; `cost` is what producing it took, in seconds."""
+        vector = np.asarray(query_vector, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO answers (namespace, query, vector, answer, cost, created)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, query, vector.tobytes(), answer, cost, now),
+            )
+            self._conn.executemany(
+                "INSERT INTO answer_chunks (answer_id, chunk_id) VALUES (?, ?)",
+                [(cursor.lastrowid, chunk_id) for chunk_id in chunk_ids],
+            )
+
+            self._ids.append(cursor.lastrowid)
+            self._created = np.append(self._created, now)
+            self._vectors = (
+                vector[None]
+                if self._vectors is None
+                else np.vstack([self._vectors, vector])
+            )
+
+    def invalidate_chunks(self, chunk_ids):
+        with self._lock:
+            with self._conn:
+                answer_ids = _answers_for_chunks(self._conn, list(chunk_ids))
+                _delete_answers(self._conn, answer_ids)
+            self._reload()
+        return len(answer_ids)
+
+    def purge_expired(self):
+        with self._lock:
+            with self._conn:
+                rows = self._conn.execute(
+                    "SELECT id FROM answers WHERE created <= ?",
+                    (time.time() - self.ttl,),
+                ).fetchall()
+                _delete_answers(self._conn, [answer_id for (answer_id,) in rows])
+            self._reload()
+
+    def report(self):
+        lookups = self.stats["lookups"]
+        hit_rate = self.stats["hits"] / lookups if lookups else 0.0
+        return (
+            f"💾 Answer cache: {self.stats['hits']}/{lookups} hits ({hit_rate:.0%}), "
+            f"~{self.stats['saved_seconds']:.1f}s saved"
+        )
@@ -0,0 +1,62 @@
+import time
+
+
+def iter_chat_text(stream):
+    """Text deltas of a (sync) OpenAI chat completion stream."""
+    for event in stream:
+        if event.choices and event.choices[0].delta.content:
+            yield event.choices[0].delta.content
+
+
+def iter_genai_text(stream):
+    """Text deltas of a google-genai generate_content_stream() response."""
+    for chunk in stream:
+        if chunk.text:
+            yield chunk.text
+
+
+def print_stream(deltas, start=None):
+    """
+    Print text deltas as they arrive. `start` is when the request was sent
+    (defaults to now). Returns the full text and its timings in seconds:
+    first_token (time to first token) and total.
+    """
+    start = time.perf_counter() if start is None else start
+    parts = []
+    first_token = None
+    for delta in deltas:
+        if first_token is None:
+            first_token = time.perf_counter()
+        print(delta, end="", flush=True)
+        parts.append(delta)
+    print()
+    return "".join(parts), _timings(start, first_token)
+
+
+async def aprint_stream(deltas, start=None):
+    """print_stream() for async iterators of deltas."""
+    start = time.perf_counter() if start is None else start
+    parts = []
+    first_token = None
+    async for delta in deltas:
+        if first_token is None:
+            first_token = time.perf_counter()
+        print(delta, end="", flush=True)
+        parts.append(delta)
+    print()
+    return "".join(parts), _timings(start, first_token)
+
+
+def _timings(start, first_token):
+    end = time.perf_counter()
+    return {
+        "first_token": (first_token or end) - start,
+        "total": end - start,
+    }
+
+
+def timing_report(timings):
+    return (
+        f"⏱️ First token after {timings['first_token']:.2f}s, "
+        f"full answer after {timings['total']:.2f}s"
+    )
@@ -0,0 +1,88 @@
+from collections import deque
+from itertools import islice
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Pages of one source are read as a single stream joined by this separator
+PAGE_SEPARATOR = "\n"
+
+
+def _overlap_tail(text, chunk_overlap):
+    """Last chunk_overlap chars of text, starting on a word boundary if possible."""
+    if len(text) <= chunk_overlap:
+        return text
+    tail = text[-chunk_overlap:]
+    space = tail.find(" ")
+    return tail[space + 1 :] if 0 <= space < len(tail) - 1 else tail
+
+
+def batched(iterable, size):
+    """Yield lists of up to `size` items, e.g. to add_documents() a chunk stream."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def stream_chunks(pages, chunk_size=1000, chunk_overlap=200):
+    """
+    Chunk an iterator of page Documents (e.g. `PyPDFLoader(...).lazy_load()`)
+    without ever holding more than one page plus the overlap tail.
+
+    Each page is split together with the last `chunk_overlap` chars of the
+    previous page of the same source, so text running across a page break
+    still lands in one chunk. Chunks get the metadata of the page they start
+    on, with `page` and `start_index` pointing at where that is.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+
+    source = None
+    tail = ""
+    stream_end = None  # stream offset right after the last page read
+    page_starts = deque()  # (stream offset, page metadata) of pages still in the tail
+
+    for page in pages:
+        metadata = page.metadata
+        if metadata.get("source") != source:
+            # New document: nothing carries over
+            source = metadata.get("source")
+            tail = ""
+            stream_end = None
+            page_starts.clear()
+
+        page_start = 0 if stream_end is None else stream_end + len(PAGE_SEPARATOR)
+        page_starts.append((page_start, metadata))
+
+        prefix = tail + PAGE_SEPARATOR if tail else ""
+        buffer = prefix + page.page_content
+        buffer_start = page_start - len(prefix)
+
+        index = 0
+        previous_len = 0
+        for text in splitter.split_text(buffer):
+            # Same offset search LangChain's add_start_index does
+            index = buffer.find(text, max(0, index + previous_len - chunk_overlap))
+            previous_len = len(text)
+            if index + len(text) <= len(prefix):
+                continue  # lies fully in the tail, already emitted with the previous page
+
+            chunk_start = buffer_start + index
+            start_page, start_metadata = next(
+                (start, meta)
+                for start, meta in reversed(page_starts)
+                if start <= chunk_start
+            )
+            yield Document(
+                page_content=text,
+                metadata={**start_metadata, "start_index": chunk_start - start_page},
+            )
+
+        stream_end = page_start + len(page.page_content)
+        tail = _overlap_tail(buffer, chunk_overlap)
+
+        # Forget pages that no longer reach into the tail
+        tail_start = stream_end - len(tail)
+        while len(page_starts) > 1 and page_starts[1][0] <= tail_start:
+            page_starts.popleft()